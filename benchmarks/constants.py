@@ -0,0 +1,137 @@
+"""Setup time of non-static constant evaluation versus scan size.
+
+Compares the historical per-point walk over np.ndindex against constant_resolver.evaluate,
+both building the (lazy) constants and evaluating them over the whole scan at once, and checks
+that both give identical destinations. Also reports the cost of looking up the destinations of
+a single point, as the acquisition does.
+
+    python benchmarks/constants.py
+"""
+
+import itertools
+import time
+from types import SimpleNamespace
+
+import numexpr
+import numpy as np
+import WrightTools as wt
+
+from yaqc_cmds.somatic import constant_resolver
+
+
+def make_scan(shape):
+    hardware = [
+        SimpleNamespace(
+            name="w1", units="nm", get_position=lambda u: wt.units.convert(1300, "nm", u)
+        ),
+        SimpleNamespace(
+            name="w2", units="nm", get_position=lambda u: wt.units.convert(1500, "nm", u)
+        ),
+        SimpleNamespace(
+            name="w3", units="wn", get_position=lambda u: wt.units.convert(7000, "wn", u)
+        ),
+        SimpleNamespace(name="d1", units="ps", get_position=lambda u: 0.0),
+        SimpleNamespace(name="d2", units="ps", get_position=lambda u: 0.0),
+        SimpleNamespace(
+            name="wm", units="nm", get_position=lambda u: wt.units.convert(600, "nm", u)
+        ),
+    ]
+    by_name = {h.name: h for h in hardware}
+    points = [
+        (np.linspace(1250, 1350, shape[0]), "nm", "w1"),
+        (np.linspace(-1, 1, shape[1]), "ps", "d1"),
+        (np.linspace(-1, 1, shape[2]), "ps", "d2"),
+    ]
+    arrs = np.meshgrid(*[p[0] for p in points], indexing="ij")
+    destinations = [
+        SimpleNamespace(arr=arr, units=units, hardware=by_name[name])
+        for arr, (_, units, name) in zip(arrs, points)
+    ]
+    constants = [
+        SimpleNamespace(
+            name="wm", units="wn", static=False, expression="2*w1-w3", hardware=by_name["wm"]
+        ),
+        SimpleNamespace(
+            name="w2", units="wn", static=False, expression="wm+1000", hardware=by_name["w2"]
+        ),
+    ]
+    return constants, destinations, hardware
+
+
+def per_point(constants, destinations, hardware, shape):
+    """The pre-vectorization algorithm, kept here as the reference."""
+    destinations = list(destinations)
+    constant_dict = {c.name: c for c in constants}
+    out = []
+    for name in constant_resolver.const_order(**{c.name: c.expression for c in constants}):
+        constant = constant_dict[name]
+        arr = np.full(shape, np.nan)
+        vals = {}
+        for hw in hardware:
+            if wt.units.is_valid_conversion(hw.units, constant.units):
+                vals[hw.name] = hw.get_position(constant.units)
+        for idx in np.ndindex(shape):
+            for d in destinations:
+                if wt.units.is_valid_conversion(d.units, constant.units):
+                    vals[d.hardware.name] = wt.units.converter(d.arr[idx], d.units, constant.units)
+            arr[idx] = numexpr.evaluate(constant.expression, vals)
+        destinations.insert(
+            0, SimpleNamespace(arr=arr, units=constant.units, hardware=constant.hardware)
+        )
+        out.append((constant, arr))
+    return out
+
+
+def lookup(result, shape):
+    """Mean time, in seconds, to look up every constant at a single point, in C order."""
+    start = time.perf_counter()
+    for idx in np.ndindex(shape):
+        for _, arr in result:
+            arr[idx]
+    return (time.perf_counter() - start) / np.prod(shape)
+
+
+def main():
+    print(
+        f"{'shape':>16} {'points':>10} {'per-point (s)':>14} {'setup (s)':>10} {'all (s)':>10}"
+        f" {'lookup (us)':>12}"
+    )
+    for n, m in itertools.product([5, 11, 21], [5, 11, 21]):
+        shape = (n, m, m)
+        scan = make_scan(shape)
+        start = time.perf_counter()
+        reference = per_point(*scan, shape)
+        per_point_time = time.perf_counter() - start
+        start = time.perf_counter()
+        result = list(constant_resolver.evaluate(*scan, shape))
+        setup_time = time.perf_counter() - start
+        start = time.perf_counter()
+        result = [np.asarray(arr) for _, arr in result]
+        full_time = time.perf_counter() - start
+        for (_, a), b in zip(reference, result):
+            assert np.array_equal(a, b), "vectorized constants differ from per-point result"
+        lazy_result = list(constant_resolver.evaluate(*scan, shape))
+        lookup_time = lookup(lazy_result, shape)
+        for (_, a), (_, b) in zip(reference, lazy_result):
+            assert all(a[idx] == b[idx] for idx in np.ndindex(shape)), "lookups differ"
+        print(
+            f"{str(shape):>16} {np.prod(shape):>10} {per_point_time:>14.4f} {setup_time:>10.4f}"
+            f" {full_time:>10.4f} {1e6 * lookup_time:>12.1f}"
+        )
+    for shape in [(51, 51, 51), (201, 201, 51)]:
+        scan = make_scan(shape)
+        start = time.perf_counter()
+        result = list(constant_resolver.evaluate(*scan, shape))
+        setup_time = time.perf_counter() - start
+        start = time.perf_counter()
+        result = [np.asarray(arr) for _, arr in result]
+        full_time = time.perf_counter() - start
+        lookup_time = lookup(list(constant_resolver.evaluate(*scan, shape)), shape)
+        print(
+            f"{str(shape):>16} {np.prod(shape):>10} {'-':>14} {setup_time:>10.4f} {full_time:>10.4f}"
+            f" {1e6 * lookup_time:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
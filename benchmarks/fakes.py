@@ -0,0 +1,260 @@
+"""In-process stand-ins for yaq daemons, with configurable latencies.
+
+Each fake implements the part of the yaqc.Client interface used by yaqc-cmds drivers. Every
+call costs `rpc` seconds, motions keep the daemon busy for `move` seconds and measurements keep
+sensors busy for `measure` seconds. install replaces yaqc.Client, so it must be called before
+any yaqc-cmds hardware or sensors are imported.
+"""
+
+import itertools
+import time
+
+import numpy as np
+
+
+class Daemon:
+    kind = "fake"
+    traits = []
+
+    def __init__(self, name, rpc=0.0):
+        self.name = name
+        self.rpc = rpc
+        self._busy_until = 0.0
+
+    def _call(self):
+        if self.rpc:
+            time.sleep(self.rpc)
+
+    def _occupy(self, duration):
+        self._busy_until = time.time() + duration
+
+    def busy(self):
+        self._call()
+        return time.time() < self._busy_until
+
+    def id(self):
+        self._call()
+        return {"name": self.name, "kind": self.kind, "make": None, "model": None, "serial": None}
+
+    def register_connection_callback(self, callback):
+        pass
+
+
+class ContinuousHardware(Daemon):
+    kind = "fake-continuous-hardware"
+    traits = ["has-limits", "has-position", "is-daemon", "is-homeable"]
+
+    def __init__(self, name, units, limits, rpc=0.0, move=0.0):
+        super().__init__(name, rpc)
+        self.units = units
+        self.limits = limits
+        self.move = move
+        self.position = float(np.mean(limits))
+
+    def get_units(self):
+        self._call()
+        return self.units
+
+    def get_limits(self):
+        self._call()
+        return self.limits
+
+    def get_position(self):
+        self._call()
+        return self.position
+
+    def set_position(self, position):
+        self._call()
+        self.position = float(position)
+        self._occupy(self.move)
+
+    def home(self):
+        self.set_position(self.position)
+
+
+class Spectrometer(ContinuousHardware):
+    kind = "fake-spectrometer"
+    traits = ContinuousHardware.traits + ["has-turret"]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.turret = "1"
+
+    def get_turret_options(self):
+        self._call()
+        return ["1", "2"]
+
+    def get_turret(self):
+        self._call()
+        return self.turret
+
+    def set_turret(self, turret):
+        self._call()
+        self.turret = turret
+        self._occupy(self.move)
+
+
+class OPA(ContinuousHardware):
+    kind = "fake-attune-delay"
+
+    def __init__(self, name, rpc=0.0, move=0.0, motors=("c1", "d1", "s1"), npts=13):
+        super().__init__(name, "nm", (1140.0, 1620.0), rpc, move)
+        self.arrangement = "sig"
+        self.setpoints = np.linspace(*self.limits, npts)
+        self.tunes = {m: np.linspace(10 * i, 10 * i + 5, npts) for i, m in enumerate(motors, 1)}
+        self.setables = {m: float(np.mean(t)) for m, t in self.tunes.items()}
+
+    def get_instrument(self):
+        import attune
+
+        self._call()
+        tunes = {m: attune.Tune(self.setpoints, t) for m, t in self.tunes.items()}
+        arrangements = {self.arrangement: attune.Arrangement(self.arrangement, tunes)}
+        return attune.Instrument(arrangements, name=self.name).as_dict()
+
+    def get_arrangement(self):
+        self._call()
+        return self.arrangement
+
+    def get_all_arrangements(self):
+        self._call()
+        return [self.arrangement]
+
+    def set_arrangement(self, arrangement):
+        self._call()
+
+    def get_setable_names(self):
+        self._call()
+        return list(self.setables)
+
+    def get_setable_positions(self):
+        self._call()
+        return dict(self.setables)
+
+    def set_setable_positions(self, positions):
+        self._call()
+        self.setables.update({k: float(v) for k, v in positions.items()})
+        self._occupy(self.move)
+
+    def set_position(self, position):
+        self.set_position_except(position, [])
+
+    def set_position_except(self, position, exceptions):
+        self._call()
+        self.position = float(position)
+        for m, t in self.tunes.items():
+            if m not in exceptions:
+                self.setables[m] = float(np.interp(position, self.setpoints, t))
+        self._occupy(self.move)
+
+    def home_setables(self, setables):
+        self._call()
+        self._occupy(self.move)
+
+
+class Sensor(Daemon):
+    kind = "fake-triggered-sensor"
+    traits = ["has-measure-trigger", "is-sensor", "is-daemon"]
+
+    def __init__(self, name, rpc=0.0, measure=0.0, channels=4, spectrum=0):
+        """Triggered sensor with scalar channels, or a single mapped spectrum channel."""
+        super().__init__(name, rpc)
+        self.measure_time = measure
+        self.channel_names = [f"ch{i}" for i in range(channels)]
+        self.spectrum = spectrum
+        if spectrum:
+            self.traits = self.traits + ["has-mapping"]
+            self.channel_names = ["spectrum"]
+        self._ids = itertools.count()
+        self._rng = np.random.default_rng(0)
+        self._measured = {"measurement_id": -1}
+
+    def measure(self, loop=False):
+        self._call()
+        self._occupy(self.measure_time)
+        if self.spectrum:
+            out = {"spectrum": self._rng.random(self.spectrum), "mapping_id": 0}
+        else:
+            out = {ch: self._rng.random() for ch in self.channel_names}
+        out["measurement_id"] = next(self._ids)
+        self._measured = out
+        return out["measurement_id"]
+
+    def get_measured(self):
+        self._call()
+        return dict(self._measured)
+
+    def get_channel_names(self):
+        self._call()
+        return list(self.channel_names)
+
+    def get_channel_units(self):
+        self._call()
+        return {ch: None for ch in self.channel_names}
+
+    def get_channel_shapes(self):
+        self._call()
+        if self.spectrum:
+            return {"spectrum": (self.spectrum,)}
+        return {ch: () for ch in self.channel_names}
+
+    def get_channel_mappings(self):
+        self._call()
+        return {"spectrum": ["wavelengths"]}
+
+    def get_mapping_units(self):
+        self._call()
+        return {"wavelengths": "nm"}
+
+    def get_mappings(self):
+        self._call()
+        return {"wavelengths": np.linspace(400, 800, self.spectrum), "mapping_id": 0}
+
+
+def daemons(rpc=0.0, move=0.0, measure=0.0, channels=4, spectrum=0):
+    """The fake system used by the benchmarks, {port: daemon}.
+
+    A second, mapped, sensor is included if spectrum is nonzero.
+    """
+    out = {
+        39001: ContinuousHardware("fd1", "ps", (-100.0, 100.0), rpc, move),
+        39002: ContinuousHardware("fd2", "ps", (-100.0, 100.0), rpc, move),
+        39876: Spectrometer("fwm", "nm", (0.0, 1600.0), rpc, move),
+        39400: OPA("fw1", rpc, move),
+        39900: Sensor("fake_sensor", rpc, measure, channels),
+    }
+    if spectrum:
+        out[39901] = Sensor("fake_array", rpc, measure, spectrum=spectrum)
+    return out
+
+
+def config(daemons):
+    """System config matching daemons."""
+    sensors = {"settings": {"ms_wait": 0}}
+    for port, daemon in daemons.items():
+        if isinstance(daemon, Sensor):
+            sensors[daemon.name] = {"enable": True, "yaqd_port": port}
+    return {
+        "system_name": "benchmark",
+        "google_drive": {"enable": False},
+        "sensors": sensors,
+        "hardware": {
+            "delays": {
+                "fd1": {"yaqd_port": 39001, "native_units": "ps", "label": "1", "factor": 1},
+                "fd2": {"yaqd_port": 39002, "native_units": "ps", "label": "2", "factor": 1},
+            },
+            "opas": {"fw1": {"yaqd_port": 39400, "native_units": "nm", "label": "1"}},
+            "spectrometers": {"fwm": {"yaqd_port": 39876, "native_units": "nm", "label": "m"}},
+        },
+        "modules": {},
+    }
+
+
+def install(daemons):
+    """Route yaqc.Client to the given {port: daemon} fakes."""
+    import yaqc
+
+    def client(port, host="127.0.0.1"):
+        return daemons[port]
+
+    yaqc.Client = client
@@ -0,0 +1,72 @@
+"""Cost and correctness of multi-shot statistics, over several sensors.
+
+Measures every fake sensor (scalar channels, and a mapped spectrum if asked for) shot by shot,
+exactly as the acquisition does at each scan point, and compares the streaming mean and
+standard error against numpy over the same shots.
+
+    python benchmarks/shots.py
+    python benchmarks/shots.py --shots 16 --spectrum 1024
+"""
+
+import argparse
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+import fakes
+from yaqc_cmds.somatic._statistics import Statistics
+
+
+def measure(daemons):
+    """A single shot of every sensor, as {channel: value} per sensor."""
+    out = []
+    for d in daemons:
+        d.measure()
+        measured = d.get_measured()
+        measured.pop("measurement_id")
+        measured.pop("mapping_id", None)
+        out.append(measured)
+    return out
+
+
+def run(shots, points, channels, spectrum):
+    daemons = [d for d in fakes.daemons(channels=channels, spectrum=spectrum).values()]
+    daemons = [d for d in daemons if isinstance(d, fakes.Sensor)]
+    elapsed = 0.0
+    for _ in range(points):
+        statistics = Statistics()
+        history = []
+        for _ in range(shots):
+            measured = measure(daemons)
+            history.append(measured)
+            sensors = [SimpleNamespace(channels=m) for m in measured]
+            start = time.perf_counter()
+            statistics.add_shot(sensors)
+            elapsed += time.perf_counter() - start
+        stderr = statistics.stderr()
+        for i, d in enumerate(daemons):
+            for ch in d.channel_names:
+                values = np.array([shot[i][ch] for shot in history])
+                mean = values.mean(axis=0)
+                error = values.std(axis=0, ddof=1) / np.sqrt(shots)
+                assert np.allclose(statistics.mean[ch], mean), f"mean of {ch} is wrong"
+                assert np.allclose(stderr[ch], error), f"stderr of {ch} is wrong"
+    return elapsed, len(daemons)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shots", type=int, default=4)
+    parser.add_argument("--points", type=int, default=1000)
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument("--spectrum", type=int, default=256)
+    args = parser.parse_args()
+    elapsed, nsensors = run(args.shots, args.points, args.channels, args.spectrum)
+    per_shot = elapsed / (args.shots * args.points)
+    print(f"{nsensors} sensors, {args.shots} shots: statistics agree with numpy")
+    print(f"{1e6 * per_shot:.1f} us per shot")
+
+
+if __name__ == "__main__":
+    main()
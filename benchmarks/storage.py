@@ -0,0 +1,90 @@
+"""File size, write and read throughput, per storage option.
+
+Writes the same synthetic scan as writes.py under each set of storage options (the [data]
+section of the system config), with end of slice flushes unless told otherwise. Then reads
+every line of every channel and variable back, along the slowest and along the fastest scan
+axis, as when slicing the finished data.
+
+    python benchmarks/storage.py
+    python benchmarks/storage.py --shape 100 100 --spectrum 256 --flush point
+"""
+
+import argparse
+import itertools
+import tempfile
+import time
+
+import h5py
+import numpy as np
+
+import writes
+
+options = [
+    {},
+    {"chunk_kb": 64},
+    {"compression": "lzf"},
+    {"compression": "lzf", "chunk_kb": 64},
+    {"compression": "gzip", "chunk_kb": 64},
+    {"compression": "gzip", "compression_opts": 1, "chunk_kb": 64},
+    {"compression": "gzip", "shuffle": False, "chunk_kb": 64},
+    {"channel_dtype": "float32", "variable_dtype": "float32"},
+    {"compression": "lzf", "chunk_kb": 64, "channel_dtype": "float32"},
+    {
+        "compression": "gzip",
+        "chunk_kb": 64,
+        "channel_dtype": "float32",
+        "variable_dtype": "float32",
+    },
+]
+
+
+def read(path, shape, axis):
+    """Seconds to read every line along axis of every dataset of the full scan shape."""
+    shape = tuple(shape)
+    start = time.perf_counter()
+    with h5py.File(path, "r") as f:
+        for ds in f.values():
+            if not isinstance(ds, h5py.Dataset) or ds.shape[: len(shape)] != shape:
+                continue
+            others = [range(n) if i != axis else [slice(None)] for i, n in enumerate(shape)]
+            for line in itertools.product(*others):
+                ds[line]
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shape", type=int, nargs="+", default=[50, 50])
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument("--spectrum", type=int, default=0)
+    parser.add_argument("--variables", type=int, default=10, help="recorded hardware variables")
+    parser.add_argument("--flush", default="slice", choices=["point", "slice"])
+    args = parser.parse_args()
+    npts = int(np.prod(args.shape))
+    print(
+        f"{'storage':>72} {'points/s':>10} {'size (kB)':>10} {'slow read (ms)':>15}"
+        f" {'fast read (ms)':>15}"
+    )
+    with tempfile.TemporaryDirectory() as folder:
+        for storage in options:
+            elapsed, size, _, path = writes.run(
+                folder,
+                args.shape,
+                args.flush,
+                {},
+                args.channels,
+                args.spectrum,
+                args.variables,
+                storage=storage,
+            )
+            label = " ".join(f"{k}={v}" for k, v in storage.items()) or "default"
+            slow = read(path, args.shape, 0)
+            fast = read(path, args.shape, len(args.shape) - 1)
+            print(
+                f"{label:>72} {npts / elapsed:>10.0f} {size / 1e3:>10.1f}"
+                f" {1e3 * slow:>15.1f} {1e3 * fast:>15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""End-to-end acquisition throughput against fake daemons.
+
+Every case runs one acquisition module headlessly, in its own process, against the in-process
+fake daemons of fakes.py. Results are collected from the timing summary each scan writes
+(points per second and per-phase time), along with wall time and peak memory of the process,
+and dumped as JSON.
+
+    python benchmarks/throughput.py --output throughput.json
+    python benchmarks/throughput.py --modules scan --shapes 1000 50x50 --latency typical
+    python benchmarks/throughput.py --option pipelined=True --option shots=4
+
+Tuning modules do not import in this tree yet, so they are left out of the default matrix. They
+can still be chosen with --modules, cases which fail report their error instead of timings.
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+
+import toml
+
+__here__ = pathlib.Path(__file__).parent
+
+# seconds, {name: (rpc, move, measure)}
+latencies = {
+    "zero": (0.0, 0.0, 0.0),
+    "typical": (0.0005, 0.005, 0.01),
+    "slow": (0.002, 0.05, 0.1),
+}
+
+modules = ["scan", "motortune", "tune_test", "tune_intensity", "tune_setpoint", "tune_holistic"]
+default_modules = ["scan", "motortune"]
+
+
+### aqn files #################################################################
+
+
+def write_aqn(path, module, shape, options):
+    """Write an aqn file for module, with one scanned axis per entry of shape."""
+    import WrightTools as wt
+
+    path.touch()
+    aqn = wt.kit.INI(path)
+    aqn.add_section("info")
+    aqn.write("info", "name", "x".join(str(n) for n in shape))
+    aqn.write("info", "info", "throughput benchmark")
+    aqn.write("info", "module", module.upper().replace("_", " "))
+    if options:
+        aqn.add_section("acquisition")
+        for k, v in options.items():
+            aqn.write("acquisition", k, v)
+    if module == "scan":
+        hardware = [("fd1", "ps", -1.0, 1.0), ("fd2", "ps", -1.0, 1.0), ("fwm", "nm", 500, 700)]
+        if len(shape) > len(hardware):
+            raise ValueError(f"scan supports up to {len(hardware)} axes")
+        names = [h[0] for h in hardware[: len(shape)]]
+        aqn.add_section("scan")
+        aqn.write("scan", "axis names", names)
+        aqn.write("scan", "constant names", [])
+        for (name, units, start, stop), number in zip(hardware, shape):
+            aqn.add_section(name)
+            aqn.write(name, "start", start)
+            aqn.write(name, "stop", stop)
+            aqn.write(name, "number", number)
+            aqn.write(name, "units", units)
+            aqn.write(name, "hardware", [name])
+        aqn.add_section("processing")
+        aqn.write("processing", "main channel", "ch0")
+        aqn.write("processing", "process all channels", False)
+    elif module == "motortune":
+        motors = ["c1", "d1", "s1"]
+        if len(shape) > len(motors):
+            raise ValueError(f"motortune supports up to {len(motors)} axes")
+        aqn.add_section("motortune")
+        aqn.write("motortune", "opa name", "fw1")
+        aqn.write("motortune", "motor names", motors)
+        aqn.write("motortune", "use tune points", False)
+        for i, motor in enumerate(motors):
+            aqn.add_section(motor)
+            aqn.write(motor, "method", "Scan" if i < len(shape) else "Set")
+            aqn.write(motor, "center", 10.0 * (i + 1))
+            aqn.write(motor, "width", 1.0)
+            aqn.write(motor, "number", shape[i] if i < len(shape) else 1)
+        aqn.add_section("spectrometer")
+        aqn.write("spectrometer", "method", "Static")
+        aqn.write("spectrometer", "center", 1300.0)
+        aqn.write("spectrometer", "center units", "nm")
+        aqn.write("spectrometer", "width", 0.0)
+        aqn.write("spectrometer", "number", 1)
+        aqn.add_section("processing")
+        aqn.write("processing", "do post process", False)
+        aqn.write("processing", "channel", "ch0")
+    else:
+        # tuning modules, the OPA curve gives the first axis
+        aqn.add_section("OPA")
+        aqn.write("OPA", "opa", "fw1")
+        for i, number in enumerate(shape[1:2]):
+            aqn.add_section(f"Motor{i}")
+            aqn.write(f"Motor{i}", "motor", "c1")
+            aqn.write(f"Motor{i}", "width", 1.0)
+            aqn.write(f"Motor{i}", "num", number)
+        aqn.add_section("Spectrometer")
+        aqn.write("Spectrometer", "spectrometer", "fwm")
+        aqn.write("Spectrometer", "action", "Scanned" if len(shape) > 2 else "Tracking")
+        aqn.add_section("Spectral Axis")
+        aqn.write("Spectral Axis", "axis", "fwm")
+        aqn.write("Spectral Axis", "width", 500.0)
+        aqn.write("Spectral Axis", "num", shape[2] if len(shape) > 2 else 1)
+        aqn.add_section("Processing")
+        aqn.write("Processing", "channel", "ch0")
+        aqn.write("Processing", "apply", False)
+        aqn.write("Processing", "gtol", 0.01)
+        aqn.write("Processing", "ltol", 0.1)
+        aqn.write("Processing", "level", False)
+
+
+### single case ###############################################################
+
+
+def peak_memory():
+    """Peak resident memory of this process in bytes, None where unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_case(case, result_path):
+    # runs in its own process, see main
+    import fakes
+
+    rpc, move, measure = latencies[case["latency"]]
+    daemons = fakes.daemons(rpc, move, measure, case["channels"], case["spectrum"])
+    fakes.install(daemons)
+    config = fakes.config(daemons)
+    config["modules"] = {case["module"]: True}
+    import yaqc_cmds.__main__
+
+    yaqc_cmds.__main__.config = config
+
+    folder = pathlib.Path(case["folder"])
+    aqn_path = folder / "case.aqn"
+    result = dict(case)
+    start = time.time()
+    try:
+        write_aqn(aqn_path, case["module"], case["shape"], case["options"])
+        from yaqc_cmds import _headless
+
+        finished = _headless.run(config, aqn_path, folder / "queue")
+        result["status"] = "finished" if finished else "error"
+    except BaseException as error:
+        result["status"] = "error"
+        result["error"] = repr(error)
+    result["wall"] = time.time() - start
+    result["peak memory"] = peak_memory()
+    summaries = list((folder / "queue").glob("**/timing.toml"))
+    if summaries:
+        result["timing"] = toml.load(summaries[0])
+    with open(result_path, "w") as f:
+        json.dump(result, f)
+
+
+def spawn(case, keep):
+    """Run case in a fresh process, so hardware and memory do not leak between cases."""
+    folder = pathlib.Path(tempfile.mkdtemp(prefix="yaqc-cmds-throughput-"))
+    case = dict(case, folder=str(folder))
+    result_path = folder / "result.json"
+    env = dict(os.environ)
+    # keep hardware state and logs away from any real installation
+    for var in ["XDG_DATA_HOME", "XDG_CACHE_HOME", "XDG_CONFIG_HOME"]:
+        env[var] = str(folder / var.lower())
+    process = subprocess.run(
+        [sys.executable, __file__, "--case", json.dumps(case), "--result", str(result_path)],
+        env=env,
+        cwd=__here__,
+        capture_output=True,
+        text=True,
+    )
+    if result_path.exists():
+        result = json.loads(result_path.read_text())
+    else:
+        result = dict(case, status="error")
+    if result["status"] == "error" and "error" not in result:
+        result["error"] = (process.stderr or process.stdout).strip()[-2000:]
+    if not keep:
+        result.pop("folder")
+    return result
+
+
+### matrix ####################################################################
+
+
+def parse_shape(s):
+    return [int(n) for n in s.split("x")]
+
+
+def parse_option(s):
+    import ast
+
+    key, value = s.split("=", 1)
+    try:
+        value = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        pass
+    return key.strip(), value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=default_modules, choices=modules)
+    parser.add_argument("--shapes", nargs="+", default=["100", "20x20", "8x8x8"])
+    parser.add_argument("--latency", nargs="+", default=["zero", "typical"], choices=latencies)
+    parser.add_argument("--channels", type=int, default=4, help="scalar sensor channels")
+    parser.add_argument(
+        "--spectrum", type=int, default=0, help="mapped spectrum length of a second sensor"
+    )
+    parser.add_argument(
+        "--option", action="append", default=[], help="[acquisition] aqn option, key=value"
+    )
+    parser.add_argument("--output", help="JSON results file, default is stdout")
+    parser.add_argument("--keep", action="store_true", help="keep data of every case")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.case:
+        run_case(json.loads(args.case), args.result)
+        return
+    options = dict(parse_option(s) for s in args.option)
+    results = []
+    for module in args.modules:
+        for shape in args.shapes:
+            for latency in args.latency:
+                case = {
+                    "module": module,
+                    "shape": parse_shape(shape),
+                    "latency": latency,
+                    "channels": args.channels,
+                    "spectrum": args.spectrum,
+                    "options": options,
+                }
+                result = spawn(case, args.keep)
+                results.append(result)
+                pps = result.get("timing", {}).get("points per second")
+                summary = f"{pps:10.1f} points/s" if pps is not None else result["status"]
+                print(f"{module:15} {shape:10} {latency:8} {summary}", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Cost of writing scan points to the data file, per flush policy.
+
+Builds data files with create_data, for fake hardware and sensors, and writes synthetic point
+records through PointBuffer under each flush policy, in the chosen acquisition order. Time
+includes the final flush and close.
+
+    python benchmarks/writes.py
+    python benchmarks/writes.py --shape 100 100 --spectrum 256 --order snake
+"""
+
+import argparse
+import os
+import pathlib
+import tempfile
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+import fakes
+from yaqc_cmds.somatic import _wt5, lazy, order
+
+policies = [
+    ("point", {}),
+    ("points", {"count": 10}),
+    ("points", {"count": 100}),
+    ("seconds", {"period": 0.1}),
+    ("seconds", {"period": 1.0}),
+    ("slice", {}),
+]
+
+
+def make_scan(shape, channels, spectrum, variables, idle=0):
+    axes = [
+        SimpleNamespace(points=np.linspace(-1, 1, n), units="ps", name=f"d{i}")
+        for i, n in enumerate(shape)
+    ]
+    # variables of the first hardware move with the scan, the second one stays put
+    hardware = []
+    for names in [[f"hw{i}" for i in range(variables)], [f"idle{i}" for i in range(idle)]]:
+        recorded = {}
+        for name in names:
+            obj = SimpleNamespace(value=SimpleNamespace(read=lambda: 0.0), units="ps")
+            recorded[name] = (obj, "ps", 1.0, name, False)
+        hardware.append(SimpleNamespace(name=f"hardware{len(hardware)}", recorded=recorded))
+    # the first hardware is driven along every axis
+    destinations = [
+        SimpleNamespace(
+            arr=lazy.AxisArray(a.points, i, shape),
+            units=a.units,
+            hardware=hardware[0],
+            method="set_position",
+            passed_args=None,
+            axis=i,
+        )
+        for i, a in enumerate(axes)
+    ]
+    daemons = [d for d in fakes.daemons(channels=channels, spectrum=spectrum).values()]
+    sensors = [
+        SimpleNamespace(
+            name=d.name, driver=SimpleNamespace(client=d), channel_names=d.channel_names
+        )
+        for d in daemons
+        if isinstance(d, fakes.Sensor)
+    ]
+    return axes, destinations, hardware, sensors
+
+
+def points(destinations, sensors, idxs, slices):
+    """Synthetic point records, as returned by WritePlan.snapshot, in acquisition order.
+
+    Slice ends are marked from the slices of the acquisition order, as the acquisition does.
+    """
+    variables = {k: 0.0 for k in destinations[0].hardware.recorded}
+    npts = len(idxs)
+    slice_index = 0
+    next_slice = slices[0] if len(slices) else None
+    for i, idx in enumerate(idxs):
+        if next_slice is not None and next_slice["index"] == i:
+            slice_index += 1
+            next_slice = slices[slice_index] if slice_index < len(slices) else None
+        point = {
+            "idx": tuple(idx),
+            "labtime": time.time(),
+            "variables": variables,
+            "channels": {},
+            "mappings": {},
+            "slice end": order.slice_end(i, npts, slices, next_slice),
+        }
+        for s in sensors:
+            s.driver.client.measure()
+            measured = s.driver.client.get_measured()
+            measured.pop("measurement_id")
+            measured.pop("mapping_id", None)
+            point["channels"].update(measured)  # mappings are constant, written by create_data
+        yield point
+
+
+def run(
+    folder,
+    shape,
+    policy,
+    kwargs,
+    channels,
+    spectrum,
+    variables,
+    storage={},
+    idle=0,
+    strategy="ndindex",
+):
+    """Write a whole scan under a flush policy.
+
+    Returns
+    -------
+    tuple
+        (seconds, file size in bytes, number of writes, path)
+    """
+    axes, destinations, hardware, sensors = make_scan(shape, channels, spectrum, variables, idle)
+    path = os.path.join(folder, f"{policy}-{'-'.join(map(str, kwargs.values()))}.wt5")
+    idxs, slices = order.process(destinations, strategy)
+    _wt5.create_data(
+        path,
+        {"name": policy},
+        destinations,
+        axes,
+        [],
+        hardware,
+        sensors,
+        storage=storage,
+        fast_axis=order.fast_axis(idxs, len(shape)),
+    )
+    records = list(points(destinations, sensors, idxs, slices))
+    buffer = _wt5.PointBuffer(policy, **kwargs)
+    start = time.perf_counter()
+    writes = 1  # the final flush
+    for point in records:
+        writes += buffer.append(point)
+    buffer.flush()
+    _wt5.data_container.close()
+    elapsed = time.perf_counter() - start
+    return elapsed, pathlib.Path(path).stat().st_size, writes, path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shape", type=int, nargs="+", default=[50, 50])
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument("--spectrum", type=int, default=0)
+    parser.add_argument("--variables", type=int, default=10, help="recorded hardware variables")
+    parser.add_argument("--idle", type=int, default=0, help="variables of idle hardware")
+    parser.add_argument("--order", default="ndindex", choices=order.strategies)
+    args = parser.parse_args()
+    npts = int(np.prod(args.shape))
+    print(
+        f"{'policy':>20} {'points':>8} {'writes':>8} {'total (s)':>10} {'per point (us)':>15}"
+        f" {'size (kB)':>10}"
+    )
+    with tempfile.TemporaryDirectory() as folder:
+        for policy, kwargs in policies:
+            elapsed, size, writes, _ = run(
+                folder,
+                args.shape,
+                policy,
+                kwargs,
+                args.channels,
+                args.spectrum,
+                args.variables,
+                idle=args.idle,
+                strategy=args.order,
+            )
+            label = " ".join([policy] + [f"{k}={v}" for k, v in kwargs.items()])
+            print(
+                f"{label:>20} {npts:>8} {writes:>8} {elapsed:>10.4f}"
+                f" {1e6 * elapsed / npts:>15.1f} {size / 1e3:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
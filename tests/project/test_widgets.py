@@ -0,0 +1,40 @@
+"""Min/max decimation of live traces."""
+
+
+import numpy as np
+
+from yaqc_cmds.project.widgets import decimate
+
+
+def test_extrema():
+    rng = np.random.default_rng(0)
+    x = np.sort(rng.uniform(0, 10, 10000))
+    y = rng.normal(size=x.size)
+    bins = 50
+    xd, yd = decimate(x, y, (0, 10), bins)
+    assert xd.size <= 2 * bins
+    assert np.all(np.diff(xd) >= 0)  # original order
+    b = np.clip((x / 10 * bins).astype(int), 0, bins - 1)
+    bd = np.clip((xd / 10 * bins).astype(int), 0, bins - 1)
+    for i in range(bins):
+        here = yd[bd == i]
+        assert here.min() == y[b == i].min()
+        assert here.max() == y[b == i].max()
+
+
+def test_window():
+    x = np.arange(1000.0)
+    y = np.sin(x)
+    y[500] = np.nan
+    xd, yd = decimate(x, y, (100, 299), 10)
+    assert xd.min() >= 100 and xd.max() <= 299
+    assert np.all(np.isfinite(yd))
+    assert yd.max() == y[100:300].max() and yd.min() == y[100:300].min()
+
+
+def test_short():
+    x = np.arange(10.0)
+    y = x**2
+    xd, yd = decimate(x, y, (0, 9), 5)
+    np.testing.assert_array_equal(xd, x)
+    np.testing.assert_array_equal(yd, y)
@@ -0,0 +1,120 @@
+"""Coverage and slices of every acquisition order strategy."""
+
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from yaqc_cmds.somatic import lazy, order
+
+
+shapes = [(7,), (4, 5), (5, 1, 6), (9, 17), (3, 4, 5)]
+
+
+def destinations(shape, speeds=None):
+    hardware = [
+        SimpleNamespace(name=f"hw{i}", speed=(speeds or {}).get(i)) for i in range(len(shape))
+    ]
+    return [
+        SimpleNamespace(
+            arr=lazy.AxisArray(np.linspace(-1, 1, n), i, shape),
+            units="ps",
+            hardware=hardware[i],
+            method="set_position",
+            axis=i,
+        )
+        for i, n in enumerate(shape)
+    ]
+
+
+@pytest.mark.parametrize("strategy", list(order.strategies))
+@pytest.mark.parametrize("shape", shapes)
+def test_coverage(strategy, shape):
+    idxs, _ = order.process(destinations(shape), strategy)
+    idxs = [tuple(idx) for idx in idxs]
+    assert len(idxs) == int(np.prod(shape))
+    assert sorted(idxs) == list(np.ndindex(*shape))
+
+
+@pytest.mark.parametrize("strategy", list(order.strategies))
+@pytest.mark.parametrize("shape", shapes)
+def test_slices(strategy, shape):
+    ds = destinations(shape)
+    indices, slices = order.process(ds, strategy)
+    idxs = [tuple(idx) for idx in indices]
+    fast = order.fast_axis(indices, len(shape))
+    start = 0
+    for s in slices:
+        # slices follow each other without gaps, in acquisition order
+        assert s["index"] == start
+        stop = start + len(s["points"])
+        expected = [ds[fast].arr[idx] for idx in idxs[start:stop]]
+        np.testing.assert_array_equal(s["points"], expected)
+        assert s["name"] == ds[fast].hardware.name
+        start = stop
+    assert start == len(idxs)
+
+
+@pytest.mark.parametrize("strategy", list(order.strategies))
+def test_slice_end(strategy):
+    idxs, slices = order.process(destinations((4, 5)), strategy)
+    ends = []
+    for i in range(len(slices)):
+        next_slice = slices[i + 1] if i + 1 < len(slices) else None
+        stop = next_slice["index"] if next_slice else len(idxs)
+        ends += [
+            order.slice_end(j, len(idxs), slices, next_slice)
+            for j in range(slices[i]["index"], stop)
+        ]
+    assert sum(ends) == len(slices)
+    assert ends[-1]
+
+
+def test_snake_neighbors():
+    idxs = list(order.snake.process(destinations((4, 5, 3)))[0])
+    steps = np.abs(np.diff(idxs, axis=0)).sum(axis=1)
+    assert np.all(steps == 1)
+
+
+def test_progressive_levels():
+    shape = (9, 17)
+    levels = order.progressive.Progressive(shape)
+    seen = np.zeros(shape, dtype=bool)
+    for level, count in enumerate(levels.counts()):
+        points = list(levels.level(level))
+        assert len(points) == count
+        seen[tuple(np.array(points).T)] = True
+        # every finished level covers the scan on a regular grid, ends included
+        rows, cols = np.nonzero(seen)
+        grid = np.ix_(np.unique(rows), np.unique(cols))
+        assert seen[grid].all() and seen.sum() == seen[grid].size
+        assert seen[0, 0] and seen[-1, -1]
+
+
+def test_travel_prefers_fast_hardware():
+    # the first axis is driven by much faster hardware, so it should be scanned fastest
+    ds = destinations((6, 6), speeds={0: 100.0, 1: 0.01})
+    idxs, _ = order.travel.process(ds)
+    assert order.fast_axis(idxs, 2) == 0
+
+
+def test_adaptive_coverage():
+    # with a signal changing everywhere, refinement only stops once the grid is full
+    shape = (9, 9)
+    adaptive = order.adaptive.Adaptive(shape, budget=81)
+    seen = []
+    for idx in adaptive:
+        seen.append(tuple(idx))
+        adaptive.tell(idx, 10.0 * idx[0] + idx[1])
+    assert len(seen) == len(set(seen)) == len(adaptive)
+    assert sorted(seen) == list(np.ndindex(*shape))
+
+
+def test_adaptive_budget():
+    adaptive = order.adaptive.Adaptive((17, 17), budget=0.3)
+    n = 0
+    for idx in adaptive:
+        n += 1
+        adaptive.tell(idx, np.nan if n % 3 else float(idx[1] > 8))
+    assert len(adaptive.coarse) <= n <= adaptive.budget
@@ -0,0 +1,46 @@
+"""Streaming statistics of repeated shots, against numpy."""
+
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from yaqc_cmds.somatic._statistics import Statistics
+
+
+def test_mean_stderr():
+    rng = np.random.default_rng(0)
+    shots = {"a": rng.normal(5, 2, 50), "b": rng.normal(-1e6, 1e-3, (50, 8))}
+    stats = Statistics()
+    for i in range(50):
+        stats.update({ch: v[i] for ch, v in shots.items()})
+    stderr = stats.stderr()
+    assert stats.count == 50
+    for ch, v in shots.items():
+        np.testing.assert_allclose(stats.mean[ch], v.mean(axis=0))
+        np.testing.assert_allclose(stderr[ch], v.std(axis=0, ddof=1) / np.sqrt(50), rtol=1e-6)
+        assert stderr[ch].shape == v.shape[1:]
+
+
+def test_single_shot():
+    stats = Statistics()
+    stats.update({"a": 3.0, "b": np.ones(4)})
+    stderr = stats.stderr()
+    assert stats.mean["a"] == 3.0
+    assert np.isnan(stderr["a"])
+    assert stderr["b"].shape == (4,) and np.all(np.isnan(stderr["b"]))
+
+
+def test_add_shot():
+    # every sensor contributes its channels to the same shot
+    sensors = [SimpleNamespace(channels={"a": 0.0}), SimpleNamespace(channels={"b": 0.0})]
+    stats = Statistics()
+    values = [(1.0, 10.0), (2.0, 30.0), (6.0, 20.0)]
+    for a, b in values:
+        sensors[0].channels = {"a": a}
+        sensors[1].channels = {"b": b}
+        stats.add_shot(sensors)
+    a, b = np.array(values).T
+    assert stats.count == 3
+    np.testing.assert_allclose([stats.mean["a"], stats.mean["b"]], [a.mean(), b.mean()])
+    np.testing.assert_allclose(stats.stderr()["b"], b.std(ddof=1) / np.sqrt(3))
@@ -0,0 +1,107 @@
+"""Writing scan points through WritePlan, read back from the file."""
+
+
+from types import SimpleNamespace
+
+import h5py
+import numpy as np
+import pytest
+
+from yaqc_cmds.somatic import _wt5
+
+
+class Value:
+    def __init__(self, value):
+        self.value = value
+
+    def read(self):
+        return self.value
+
+
+def recorded(*names):
+    return {
+        name: (SimpleNamespace(value=Value(0.0), units="ps"), "ps", 1.0, name, False)
+        for name in names
+    }
+
+
+@pytest.fixture
+def scan(tmp_path):
+    """2D scan of moved hardware, idle hardware and a single sensor, closed afterwards."""
+    shape = (4, 5)
+    axes = [
+        SimpleNamespace(points=np.linspace(-1, 1, n), units="ps", name=f"d{i}")
+        for i, n in enumerate(shape)
+    ]
+    moved = SimpleNamespace(name="moved", recorded=recorded("d0", "d1"))
+    idle = SimpleNamespace(name="idle", recorded=recorded("idle"))
+    destinations = [SimpleNamespace(hardware=moved, axis=i) for i in range(len(shape))]
+    sensor = SimpleNamespace(
+        name="sensor",
+        driver=SimpleNamespace(client=SimpleNamespace(traits=[])),
+        channel_names=["signal"],
+        channels={"signal": 0.0},
+    )
+    path = str(tmp_path / "scan.wt5")
+    plan = _wt5.create_data(
+        path, {"name": "scan"}, destinations, axes, [], [moved, idle], [sensor], storage={}
+    )
+    yield SimpleNamespace(path=path, plan=plan, shape=shape, moved=moved, idle=idle, sensor=sensor)
+    _wt5.data_container.close()
+
+
+def acquire(scan, idxs, buffer, changes=None):
+    """Snapshot every index in turn, setting idle to changes[i] before the i-th point."""
+    for i, idx in enumerate(idxs):
+        if i in (changes or {}):
+            scan.idle.recorded["idle"][0].value.value = changes[i]
+        for n, name in enumerate(["d0", "d1"]):
+            scan.moved.recorded[name][0].value.value = float(idx[n])
+        scan.sensor.channels = {"signal": 10.0 * idx[0] + idx[1]}
+        buffer.append(scan.plan.snapshot(idx))
+    buffer.flush()
+    _wt5.data_container.close()
+
+
+def test_round_trip(scan):
+    acquire(scan, list(np.ndindex(*scan.shape)), _wt5.PointBuffer("points", count=3))
+    i0, i1 = np.indices(scan.shape)
+    with h5py.File(scan.path, "r") as f:
+        np.testing.assert_array_equal(f["signal"][...], 10.0 * i0 + i1)
+        np.testing.assert_array_equal(f["d0"][...], i0)
+        np.testing.assert_array_equal(f["d1"][...], i1)
+        assert np.all(np.isfinite(f["labtime"][...]))
+        # the idle variable never changed, so it is stored once
+        assert f["idle"].shape == (1, 1)
+        assert f["idle"][0, 0] == 0.0
+
+
+def test_idle_expands(scan):
+    idxs = list(np.ndindex(*scan.shape))
+    skipped = idxs.pop(6)  # e.g. out of limits
+    acquired = idxs[:15]  # aborted before the last points
+    acquire(scan, acquired, _wt5.PointBuffer("points", count=4), changes={9: 2.0})
+    with h5py.File(scan.path, "r") as f:
+        idle = f["idle"][...]
+        labtime = f["labtime"][...]
+        signal = f["signal"][...]
+    assert idle.shape == scan.shape
+    for i, idx in enumerate(acquired):
+        assert idle[idx] == (2.0 if i >= 9 else 0.0)
+        assert np.isfinite(labtime[idx])
+    # points which were never acquired stay nan in every dataset
+    for idx in [skipped] + idxs[15:]:
+        assert np.isnan(idle[idx])
+        assert np.isnan(labtime[idx])
+        assert np.isnan(signal[idx])
+
+
+@pytest.mark.parametrize("policy", _wt5.PointBuffer.policies)
+def test_policies(scan, policy):
+    idxs = list(np.ndindex(*scan.shape))
+    buffer = _wt5.PointBuffer(policy, count=7, period=0.0)
+    acquire(scan, idxs, buffer, changes={13: 1.0})
+    with h5py.File(scan.path, "r") as f:
+        i0, i1 = np.indices(scan.shape)
+        np.testing.assert_array_equal(f["signal"][...], 10.0 * i0 + i1)
+        np.testing.assert_array_equal(f["idle"][...].ravel(), [0.0] * 13 + [1.0] * 7)
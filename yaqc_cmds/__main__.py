@@ -44,6 +44,27 @@ def launch(config_filepath):
     app.exec_()
 
 
+@main.command()
+@click.argument("aqn_filepath", type=click.Path(exists=True, dir_okay=False))
+@click.option("-c", "--config", "config_filepath")
+@click.option("-o", "--output", "output_folder", type=click.Path(file_okay=False))
+def run(aqn_filepath, config_filepath, output_folder):
+    """Run a single acquisition without a graphical interface."""
+    if config_filepath:
+        config_filepath = pathlib.Path(config_filepath)
+    else:
+        config_filepath = (
+            pathlib.Path(appdirs.user_config_dir("yaqc-cmds", "yaqc-cmds")) / "config.toml"
+        )
+
+    global config
+    config = toml.load(config_filepath)
+    from ._headless import run
+
+    finished = run(config, aqn_filepath, output_folder)
+    sys.exit(0 if finished else 1)
+
+
 @main.command(name="edit-config")
 def edit_config():
     config_filepath = (
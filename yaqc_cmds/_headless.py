@@ -0,0 +1,150 @@
+#! /usr/bin/env python
+"""
+Run acquisitions without a graphical interface.
+
+Hardware and sensors are loaded from the same config as the main window, but no widgets are
+ever created. The acquisition runs in its own thread while the main thread services Qt events,
+exactly as it would behind the queue.
+"""
+
+
+import matplotlib
+
+matplotlib.use("ps")  # important - images will be generated in worker threads
+
+import sys
+from PySide2 import QtCore
+
+app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication(sys.argv)
+
+import imp
+import os
+import pathlib
+import threading
+import traceback
+
+import WrightTools as wt
+
+
+#### import ###################################################################
+# BEWARE OF CHANGING ORDER OF IMPORTS!!!!!!!!!
+
+from .project import project_globals as g
+
+g.app.write(app)
+g.headless.write(True)
+g.logger.load()
+
+from .project import classes as pc
+
+from .__version__ import __version__
+
+g.version.write(__version__)
+
+
+### define ####################################################################
+
+
+somatic_folder = pathlib.Path(__file__).parent / "somatic"
+
+
+### queue stand-in ############################################################
+
+
+class QueueStatus:
+    def __init__(self):
+        self.go = pc.Busy()
+        self.going = pc.Busy()
+        self.pause = pc.Busy()
+        self.paused = pc.Busy()
+        self.stop = pc.Busy()
+        self.stopped = pc.Busy()
+
+
+class QueueWorker:
+    def __init__(self, folder):
+        """Everything an acquisition worker expects from the queue worker."""
+        self.queue_status = QueueStatus()
+        self.fraction_complete = pc.Number(initial_value=0.0)
+        self.queue_url = None
+        self.index = pc.Value(0)
+        self.folder = pc.Value(str(folder))
+
+
+### run #######################################################################
+
+
+def load_module(config, module_name):
+    """Import the acquisition module with the given module_name, as listed in config."""
+    for name, load in config["modules"].items():
+        if load:
+            path = os.path.join(somatic_folder, "modules", name + ".py")
+            module = imp.load_source(name, path)
+            if module.module_name == module_name:
+                return module
+    raise ValueError(f"module '{module_name}' is not enabled in config")
+
+
+def run(config, aqn_path, folder=None):
+    """Run a single acquisition against the configured hardware and sensors.
+
+    Parameters
+    ----------
+    config : dictionary
+        Parsed system config.
+    aqn_path : path-like
+        Acquisition file, copied into folder as the queue would.
+    folder : path-like (optional)
+        Output folder. Default is a new timestamped folder within ~/yaqc-cmds-data.
+
+    Returns
+    -------
+    bool
+        True if the acquisition finished.
+    """
+    g.system_name.write(config["system_name"])
+    g.google_drive_enabled.write(False)
+    g.slack_enabled.write(False)
+    g.logger.log("info", "Startup", "Yaqc_cmds is attempting headless startup")
+    # hardware
+    from . import hardware
+    from .hardware import opas
+    from .hardware import spectrometers
+    from .hardware import delays
+    from .hardware import filters
+    from .hardware.hardware import all_initialized
+    import yaqc_cmds.sensors
+
+    # output folder
+    aqn_path = pathlib.Path(aqn_path)
+    aqn = wt.kit.INI(aqn_path)
+    if folder is None:
+        name = aqn.read("info", "name")[:10]
+        folder_name = " ".join([wt.kit.TimeStamp().path, name]).rstrip()
+        folder = pathlib.Path.home() / "yaqc-cmds-data" / folder_name
+    folder = pathlib.Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    # acquisition runs outside of the main thread, which handles hardware signals
+    module = load_module(config, aqn.read("info", "module"))
+    queue_worker = QueueWorker(folder)
+    finished = pc.Bool(initial_value=False)
+
+    def target():
+        try:
+            all_initialized()
+            worker = module.Worker(str(aqn_path), queue_worker, finished)
+            worker.run()
+        except Exception as error:
+            print("ACQUISITION ERROR:", error)
+            traceback.print_exc()
+        finally:
+            QtCore.QMetaObject.invokeMethod(app, "quit", QtCore.Qt.QueuedConnection)
+
+    thread = threading.Thread(target=target, name="acquisition")
+    thread.start()
+    app.exec_()
+    thread.join()
+    # shutdown
+    g.logger.log("info", "Shutdown", "Yaqc_cmds is attempting shutdown")
+    g.shutdown.fire()
+    return finished.read()
@@ -58,6 +58,7 @@ class MainWindow(QtWidgets.QMainWindow):
         QtWidgets.QMainWindow.__init__(self, parent=None)
         self.config = config
         g.system_name.write(self.config["system_name"])
+        g.redraw.fps = self.config.get("display", {}).get("fps", 20.0)
         g.main_window.write(self)
         g.shutdown.write(self.shutdown)
         self.setWindowTitle("yaqc-cmds %s" % __version__)
@@ -1,5 +1,7 @@
 """GUI for displaying scans in progress, current slice etc."""
 
+import collections
+
 from PySide2 import QtCore, QtWidgets
 import numpy as np
 
@@ -12,6 +14,9 @@ import yaqc_cmds.project.classes as pc
 import yaqc_cmds.somatic as somatic
 
 
+trace_budget = 2**20  # values kept in lines of the live trace, beyond which the oldest go
+
+
 class GUI(QtCore.QObject):
     def __init__(self):
         QtCore.QObject.__init__(self)
@@ -19,6 +24,7 @@ class GUI(QtCore.QObject):
         self.create_settings()
         self.on_sensors_changed()
         self.data = None
+        self.reset_live_view()
 
     def create_frame(self):
         self.main_widget = g.main_window.read().plot_widget
@@ -50,6 +56,10 @@ class GUI(QtCore.QObject):
         self.plot_scatter = self.plot_widget.add_scatter()
         self.plot_line = self.plot_widget.add_line()
         display_layout.addWidget(self.plot_widget)
+        # image
+        self.image_widget = pw.Plot2D(cmap=wt.artists.colormaps["default"])
+        self.image_widget.hide()
+        display_layout.addWidget(self.image_widget)
         # vertical line
         line = pw.line("V")
         layout.addWidget(line)
@@ -75,6 +85,8 @@ class GUI(QtCore.QObject):
         input_table.add("X-Axis", self.axis)
         self.axis_units = pc.Combo()
         input_table.add("X-Units", self.axis_units)
+        self.image_axis = pc.Combo()
+        input_table.add("Image Y-Axis", self.image_axis)
         self.settings_layout.addWidget(input_table)
         # global daq settings
         input_table = pw.InputTable()
@@ -98,67 +110,178 @@ class GUI(QtCore.QObject):
         self.channel.set_allowed_values(new)
 
     def on_data_file_created(self):
-        with somatic._wt5.data_container as data:
-            try:
-                allowed = [x.decode().split("{")[0].strip() for x in data.attrs["axes"]]
-            except AttributeError:
-                allowed = [x.split("{")[0].strip() for x in data.attrs["axes"]]
-            except:
-                allowed = [None]
-            if "wa" in allowed:
-                allowed.remove("wa")
-            self.axis.set_allowed_values(allowed)
-            self.on_axis_updated()
+        self.reset_live_view()
+        allowed = [name for name in somatic._live.live_buffer.axes if name != "wa"]
+        self.axis.set_allowed_values(allowed or [None])
+        self.image_axis.set_allowed_values(allowed + ["None"])
+        if self.image_axis.read() == self.axis.read():
+            others = [name for name in allowed if name != self.axis.read()]
+            self.image_axis.write((others + ["None"])[0])
+        self.on_axis_updated()
 
     def on_axis_updated(self):
-        with somatic._wt5.data_container as data:
-            axis = data[self.axis.read()]
-            units = axis.attrs.get("units")
-            units = [units] + list(wt.units.get_valid_conversions(units))
-            self.axis_units.set_allowed_values(units)
+        if self.axis.read() not in somatic._live.live_buffer.axes:
+            return
+        _, units = somatic._live.live_buffer.axes[self.axis.read()]
+        units = [units] + list(wt.units.get_valid_conversions(units))
+        self.axis_units.set_allowed_values(units)
+
+    def reset_live_view(self):
+        self.live_count = 0  # points of the scan seen so far
+        self.lines = None  # ((axis, channel), {other indices: y}) of every line seen
+        self.slice = None  # (key, x, x limits) of the displayed slice
+        self.image = None  # (key, z) of the displayed image
+
+    def request_plot(self):
+        g.redraw.request(self.on_data_file_written)
 
     def on_data_file_written(self):
-        with somatic._wt5.data_container as data:
-            last_idx_written = somatic._wt5.data_container.last_idx_written
-            self.idx_string.write(str(last_idx_written))
-            if data is None or last_idx_written is None:
-                return
-            # data
-            x_units = self.axis_units.read()
-            idx = last_idx_written
-            axis = data[self.axis.read()]
-            limits = list(
-                wt.units.convert(
-                    [np.nanmin(axis.full), np.nanmax(axis.full)], axis.attrs.get("units"), x_units
-                )
-            )
-            channel = data[self.channel.read()]
-            plot_idx = list(last_idx_written + (0,) * (channel.ndim - len(last_idx_written)))
-            plot_idx[self.axis.read_index()] = slice(None)
+        # drawn from the live buffer, the data file is never read
+        live = somatic._live.live_buffer
+        new, self.live_count = live.since(self.live_count)
+        self.idx_string.write(str(live.last_idx))
+        self.update_trace(live, new)
+        self.update_image(live, new)
 
-            plot_idx = tuple(plot_idx)
+    def update_trace(self, live, new):
+        last_idx = live.last_idx
+        x_name, y_name, x_units = self.axis.read(), self.channel.read(), self.axis_units.read()
+        if last_idx is None or x_name not in live.axes or y_name not in live.channels:
+            return
+        axis, units = live.axes[x_name]
+        shape = live.channels[y_name]
+        axis_index = self.axis.read_index()
+        nscan = len(last_idx)
+        plot_idx = list(last_idx + (0,) * (len(shape) - nscan))
+        plot_idx[axis_index] = None
+        key = (x_name, y_name, x_units, tuple(plot_idx))
+        # lines along the axis are kept as points arrive, whatever the order of acquisition
+        if self.lines is None or self.lines[0] != key[:2] or new is None:
+            lines = self.lines[1] if self.lines and self.lines[0] == key[:2] else {}
+            self.lines = (key[:2], collections.OrderedDict(lines))
+            new = live.recent()
+        lines = self.lines[1]
+        tail = key[3][nscan:]  # dimensions beyond the scan, as displayed
+        for point in new:
+            if y_name not in point["channels"]:
+                continue
+            idx = point["idx"]
+            full = idx + tail
+            line_key = full[:axis_index] + full[axis_index + 1 :]
+            if line_key not in lines:
+                while lines and (len(lines) + 1) * shape[axis_index] > trace_budget:
+                    lines.popitem(last=False)  # least recently acquired
+                lines[line_key] = np.full(shape[axis_index], np.nan)
+            lines.move_to_end(line_key)
+            # scalar channels are published 0-d but stored with trailing length 1 dims
+            value = np.reshape(np.asarray(point["channels"][y_name], dtype=float), shape[nscan:])
+            if axis_index < nscan:
+                lines[line_key][idx[axis_index]] = value[tail]
+            else:
+                lines[line_key][:] = value[tuple(slice(None) if j is None else j for j in tail)]
+        # the axis of the displayed slice is only converted when the slice changes
+        if self.slice is None or self.slice[0] != key:
+            plot_idx[axis_index] = slice(None)
             try:
                 xi = wt.units.convert(
-                    axis[wt.kit.valid_index(plot_idx, axis.shape)],
-                    axis.attrs.get("units"),
-                    x_units,
+                    axis[wt.kit.valid_index(plot_idx, axis.shape)], units, x_units
                 )
-                yi = channel[wt.kit.valid_index(plot_idx, channel.shape)]
-                self.plot_scatter.setData(xi, yi)
             except (TypeError, ValueError) as e:
                 print(e)
-                pass
-            # limits
-            try:
-                self.plot_widget.set_xlim(min(limits), max(limits))
-                self.plot_widget.set_ylim(np.min(channel), np.max(channel))
-            except Exception as e:
-                print(e)
-                pass
+                return
+            if np.size(xi) not in (1, shape[axis_index]):
+                # scalar channels do not extend along array detector axes
+                self.slice = None
+                self.plot_widget.set_data(self.plot_scatter, [], [])
+                return
+            xi = np.array(np.broadcast_to(xi, shape[axis_index]), dtype=float)
+            xlim = wt.units.convert(np.array([np.nanmin(axis), np.nanmax(axis)]), units, x_units)
+            self.slice = (key, xi, sorted(xlim))
+        _, xi, xlim = self.slice
+        full = key[3]
+        yi = lines.get(full[:axis_index] + full[axis_index + 1 :])
+        if yi is None:
+            yi = np.full(xi.shape, np.nan)
+        # points not yet acquired (e.g. progressive order) are nan
+        finite = np.isfinite(xi) & np.isfinite(yi)
+        # limits first, long traces are decimated for the view
+        try:
+            self.plot_widget.set_xlim(*xlim)
+            if y_name in live.extents:
+                self.plot_widget.set_ylim(*live.extents[y_name])
+        except Exception as e:
+            print(e)
+            pass
+        self.plot_widget.set_data(self.plot_scatter, xi[finite], yi[finite])
+
+    def update_image(self, live, new):
+        # pixels are only written for new points, the whole image is only rebuilt on change and
+        # only redrawn when pixels were written
+        last_idx = live.last_idx
+        x_name, y_name, x_units = self.axis.read(), self.image_axis.read(), self.axis_units.read()
+        z_name = self.channel.read()
+        names = self.axis.allowed_values
+        if (
+            last_idx is None
+            or x_name == y_name
+            or not {x_name, y_name} <= set(live.axes) & set(names)
+            or z_name not in live.channels
+        ):
+            self.image = None
+            self.image_widget.hide()
+            return
+        shape = live.channels[z_name]
+        dims = (names.index(x_name), names.index(y_name))
+        image_idx = list(last_idx + (0,) * (len(shape) - len(last_idx)))
+        for dim in dims:
+            image_idx[dim] = None
+        key = (x_name, y_name, z_name, x_units, tuple(image_idx))
+        if self.image is None or self.image[0] != key or new is None:
+            ends = []
+            labels = []
+            for name, dim, units in zip((x_name, y_name), dims, (x_units, None)):
+                values, native = live.axes[name]
+                units = units or native
+                labels.append(f"{name} ({units})")
+                line_idx = [0 if i is None else i for i in image_idx]
+                line_idx[dim] = slice(None)
+                line = np.ravel(values[wt.kit.valid_index(line_idx, values.shape)])
+                try:
+                    ends.append(wt.units.convert(np.array(line[[0, -1]]), native, units))
+                except (TypeError, ValueError) as e:
+                    print(e)
+                    return
+            zi = np.full((shape[dims[0]], shape[dims[1]]), np.nan)
+            self.image = (key, zi)
+            self.image_widget.set_image(zi)
+            self.image_widget.set_extent(*ends)
+            self.image_widget.set_labels(*labels)
+            self.image_widget.show()
+            new = live.recent()
+        _, zi = self.image
+        written = False
+        for point in new:
+            idx = point["idx"]
+            if z_name not in point["channels"]:
+                continue
+            if any(i != j for i, j in zip(idx, key[4]) if j is not None):
+                continue  # another image
+            # scalar channels are published 0-d but stored with trailing length 1 dims
+            value = np.reshape(
+                np.asarray(point["channels"][z_name], dtype=float), shape[len(idx) :]
+            )
+            # dimensions beyond the scan, such as those of array detectors, fill whole lines
+            value = value[tuple(slice(None) if j is None else j for j in key[4][len(idx) :])]
+            if dims[0] > dims[1] and dims[1] >= len(idx):
+                value = value.T
+            zi[tuple(idx[dim] if dim < len(idx) else slice(None) for dim in dims)] = value
+            written = True
+        if written:
+            self.image_widget.set_image(zi, levels=live.extents.get(z_name))
 
     def on_sensors_changed(self):
         for s in sensors.sensors:
-            s.update_ui.connect(self.update_big_number)
+            s.update_ui.connect(lambda: g.redraw.request(self.update_big_number))
         self.on_channels_changed()
 
     def on_shutdown(self):
@@ -181,10 +304,12 @@ class GUI(QtCore.QObject):
 
 
 gui = GUI()
-somatic.signals.data_file_written.connect(gui.on_data_file_written)
+somatic.signals.data_file_written.connect(gui.request_plot)
+somatic.signals.live_updated.connect(gui.request_plot)
 somatic.signals.data_file_created.connect(gui.on_data_file_created)
 sensors.signals.channels_changed.connect(gui.on_channels_changed)
 sensors.signals.sensors_changed.connect(gui.on_sensors_changed)
 gui.axis.updated.connect(gui.on_axis_updated)
-gui.axis.updated.connect(gui.on_data_file_written)
-gui.axis_units.updated.connect(gui.on_data_file_written)
+gui.axis.updated.connect(gui.request_plot)
+gui.axis_units.updated.connect(gui.request_plot)
+gui.image_axis.updated.connect(gui.request_plot)
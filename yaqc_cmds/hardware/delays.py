@@ -88,7 +88,7 @@ class GUI(hw.GUI):
         # finish
         self.scroll_layout.addStretch(1)
         self.layout.addStretch(1)
-        self.hardware.update_ui.connect(self.update)
+        self.hardware.update_ui.connect(lambda: g.redraw.request(self.update))
 
     def on_home(self):
         self.driver.hardware.q.push("home")
@@ -44,6 +44,9 @@ class Driver(pc.Driver):
         self.serial = self.hardware.serial
         self.label = pc.String(kwargs["label"], display=True)
         self.native_units = kwargs["native_units"]
+        # used to estimate travel time, native units per second and native units
+        self.speed = kwargs.get("speed")
+        self.backlash = kwargs.get("backlash", 0.0)
         self.state_filepath = (
             pathlib.Path(appdirs.user_data_dir("yaqc-cmds", "yaqc-cmds"))
             / "hardware"
@@ -245,6 +248,8 @@ class Hardware(pc.Hardware):
         self.offset = self.driver.offset
         self.position = self.exposed[0]
         self.native_units = self.driver.native_units
+        self.speed = self.driver.speed
+        self.backlash = self.driver.backlash
         self.destination = pc.Number(units=self.native_units, display=True)
         self.destination.write(self.position.read(self.native_units), self.native_units)
         self.limits = self.driver.limits
@@ -315,6 +320,8 @@ class Hardware(pc.Hardware):
 
 
 def import_hardwares(config, name, Driver, GUI, Hardware):
+    if g.headless.read():
+        GUI = None
     hardwares = []
     for hw_name, section in config.items():
         if section.get("enable", True):
@@ -326,6 +333,8 @@ def import_hardwares(config, name, Driver, GUI, Hardware):
             model = section.get("model", "yaq")
             hardware = Hardware(Driver, kwargs, GUI, name=hw_name, model=model)
             hardwares.append(hardware)
+    if g.headless.read():
+        return hardwares, None, None
     gui = pw.HardwareFrontPanel(hardwares, name=name)
     advanced_gui = pw.HardwareAdvancedPanel(hardwares, gui.advanced_button)
     return hardwares, gui, advanced_gui
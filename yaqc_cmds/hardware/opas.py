@@ -230,7 +230,7 @@ class GUI(hw.GUI):
         settings_layout.addStretch(1)
         # signals and slots
         self.arrangement_combo.updated.connect(self.update_plot)
-        self.driver.update_ui.connect(self.update)
+        self.driver.update_ui.connect(lambda: g.redraw.request(self.update))
         # finish
         self.update()
         self.update_plot()
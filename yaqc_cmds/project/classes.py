@@ -515,7 +515,11 @@ class Number(PyCMDS_Object):
         self.widget.setSingleStep(self.single_step)
         self.set_widget()
         # connect signals and slots
-        self.updated.connect(self.set_widget)
+        if self.display:
+            # redrawn with the live displays, inputs stay immediate so edits are never overwritten
+            self.updated.connect(lambda: g.redraw.request(self.set_widget))
+        else:
+            self.updated.connect(self.set_widget)
         self.widget.editingFinished.connect(lambda: self.write(self.widget.value()))
         # finish
         self.widget.setToolTip(self.tool_tip)
@@ -1,3 +1,4 @@
+import threading
 import time
 
 from PySide2 import QtWidgets, QtCore
@@ -78,9 +79,24 @@ class hardware_waits:
     def add(self, method):
         self.value.append(method)
 
-    def wait(self):
-        for method in self.value:
-            method()
+    def wait(self, hardwares=None):
+        """
+        wait until still
+
+        if hardwares is given, only those are waited on, otherwise all registered methods are
+        called in turn
+        """
+        if hardwares is None:
+            for method in self.value:
+                method()
+            return
+        hardwares = list(dict.fromkeys(hardwares))
+        # ask every busy hardware to report in before blocking on any of them
+        for hardware in hardwares:
+            if hardware.busy.read() and not hardware.q.enqueued.read():
+                hardware.q.push("check_busy")
+        for hardware in hardwares:
+            hardware.wait_until_still()
 
 
 hardware_waits = hardware_waits()
@@ -106,6 +122,8 @@ class hardware_widget(SimpleGlobal):
 
 hardware_widget = hardware_widget()
 
+headless = SimpleGlobal(False)  # True when running without a graphical interface
+
 main_thread = SimpleGlobal(QtCore.QThread.currentThread())
 
 main_window = SimpleGlobal()
@@ -129,7 +147,8 @@ class QueueControl(QtCore.QObject):
                 # widget has been deleted, probably
                 self.widgets_to_disable.remove(widget)
         self.value = value
-        main_window.read().queue_control.emit()
+        if main_window.read() is not None:
+            main_window.read().queue_control.emit()
 
     def disable_when_true(self, widget):
         self.widgets_to_disable.append(widget)
@@ -172,6 +191,56 @@ class progress_bar:
 progress_bar = progress_bar()
 
 
+class redraw(QtCore.QObject):
+    """
+    coalesces display updates, so displays are redrawn at most fps times per second
+
+    request(method) schedules method for the next frame, from any thread
+    requests for the same method before that frame are merged, intermediate frames are dropped
+    methods always run in the main thread
+    """
+
+    _requested = QtCore.Signal()
+
+    def __init__(self, fps=20.0):
+        QtCore.QObject.__init__(self)
+        self.fps = fps
+        self.pending = {}  # methods of the next frame, in order requested
+        self.lock = threading.Lock()
+        self.last_frame = 0.0
+        self.timer = None
+        self._requested.connect(self._schedule)
+
+    def request(self, method):
+        with self.lock:
+            if method in self.pending:
+                return
+            self.pending[method] = None
+        self._requested.emit()  # queued to the main thread if need be
+
+    def _schedule(self):
+        if self.timer is None:
+            self.timer = QtCore.QTimer()
+            self.timer.setSingleShot(True)
+            self.timer.timeout.connect(self._frame)
+        if self.timer.isActive():
+            return
+        period = 1.0 / self.fps if self.fps > 0 else 0.0
+        delay = max(0.0, self.last_frame + period - time.time())
+        self.timer.start(int(delay * 1000))
+
+    def _frame(self):
+        with self.lock:
+            methods = list(self.pending)
+            self.pending.clear()
+        self.last_frame = time.time()
+        for method in methods:
+            method()
+
+
+redraw = redraw()
+
+
 class shutdown(SimpleGlobal):
     """
     holds the reference of MainWindow.shutdown Qt signal
@@ -190,7 +259,8 @@ class shutdown(SimpleGlobal):
     def fire(self):
         for method in self.methods:
             method()
-        main_window.read().close()
+        if main_window.read() is not None:
+            main_window.read().close()
 
 
 shutdown = shutdown()
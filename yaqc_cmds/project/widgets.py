@@ -2,10 +2,12 @@
 
 
 import collections
+import functools
 import pathlib
 
 from PySide2 import QtWidgets, QtCore
 
+import numpy as np
 import pyqtgraph as pg
 
 from yaqc_cmds.project import project_globals as g
@@ -623,9 +625,10 @@ class HardwareLayoutWidget(QtWidgets.QGroupBox):
         g.queue_control.disable_when_true(set_button)
         button_container.layout().addWidget(set_button)
         set_button.clicked.connect(set_method)
+        decide = functools.partial(set_button_decide, set_button, hardwares)
         for hardware in hardwares:
             set_button.setDisabled(hardware.busy.read())  # first time
-            hardware.update_ui.connect(lambda: set_button_decide(set_button, hardwares))
+            hardware.update_ui.connect(lambda: g.redraw.request(decide))
         return [advanced_button, set_button]
 
 
@@ -648,7 +651,7 @@ class HardwareFrontPanel(QtCore.QObject):
         # link hardware object signals
         self.hardwares = hardwares
         for hardware in self.hardwares:
-            hardware.update_ui.connect(self.update)
+            hardware.update_ui.connect(lambda: g.redraw.request(self.update))
         # create gui
         self.create_frame()
 
@@ -810,6 +813,34 @@ class ChoiceWindow(QtWidgets.QMessageBox):
 ### plotting ##################################################################
 
 
+def decimate(x, y, xlim, bins):
+    """Min/max decimation of points x, y to at most two per bin of x within xlim.
+
+    The points of lowest and highest y are kept for every bin, in their original order. Points
+    outside of xlim are dropped. Traces which already have at most two points per bin are
+    returned whole.
+    """
+    if bins < 1 or x.size <= 2 * bins:
+        return x, y
+    low, high = xlim
+    inside = (x >= low) & (x <= high) & np.isfinite(y)
+    x, y = x[inside], y[inside]
+    if x.size <= 2 * bins or not high > low:
+        return x, y
+    b = np.clip(((x - low) / (high - low) * bins).astype(int), 0, bins - 1)
+    order = np.argsort(b, kind="stable")
+    b, ys = b[order], y[order]
+    new = np.concatenate([[True], b[1:] != b[:-1]])
+    starts, segment = np.flatnonzero(new), np.cumsum(new) - 1
+    keep = []
+    for extreme in (np.minimum, np.maximum):
+        hits = np.flatnonzero(ys == extreme.reduceat(ys, starts)[segment])
+        first = np.concatenate([[True], segment[hits][1:] != segment[hits][:-1]])
+        keep.append(order[hits[first]])
+    keep = np.unique(np.concatenate(keep))
+    return x[keep], y[keep]
+
+
 class Plot1D(pg.GraphicsView):
     def __init__(self, title=None, xAutoRange=True, yAutoRange=True):
         pg.GraphicsView.__init__(self)
@@ -831,6 +862,17 @@ class Plot1D(pg.GraphicsView):
         # title
         if title:
             self.plot_object.setTitle(title)
+        # decimated traces
+        self.traces = {}  # {item: (x, y)}, full data of items shown through set_data
+        self.plot_object.sigXRangeChanged.connect(self.on_view_changed)
+
+    def resizeEvent(self, event):
+        pg.GraphicsView.resizeEvent(self, event)
+        self.on_view_changed()
+
+    def on_view_changed(self):
+        if self.traces:
+            g.redraw.request(self.redecimate)
 
     def add_scatter(self, color="c", size=3, symbol="o"):
         curve = pg.ScatterPlotItem(symbol=symbol, pen=(color), brush=(color), size=size)
@@ -882,6 +924,22 @@ class Plot1D(pg.GraphicsView):
         self.plot_object.addItem(line)
         return line
 
+    def set_data(self, item, x, y):
+        """Show x, y in item, decimated to at most two points per horizontal pixel in view.
+
+        Traces are decimated again whenever the view changes, so rendering cost does not depend
+        on the length of the trace.
+        """
+        self.traces[item] = (np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        self.redecimate(item)
+
+    def redecimate(self, item=None):
+        view = self.plot_object.getViewBox()
+        xlim = view.viewRange()[0]
+        bins = int(view.width())
+        for key in self.traces if item is None else [item]:
+            key.setData(*decimate(*self.traces[key], xlim, bins))
+
     def set_labels(self, xlabel=None, ylabel=None):
         if xlabel:
             self.plot_object.setLabel("bottom", text=xlabel)
@@ -898,3 +956,53 @@ class Plot1D(pg.GraphicsView):
 
     def clear(self):
         self.plot_object.clear()
+        self.traces.clear()
+
+
+class Plot2D(Plot1D):
+    def __init__(self, title=None, cmap=None):
+        """Plot1D holding a single image, which is never autoranged.
+
+        Parameters
+        ----------
+        title : string (optional)
+            Plot title.
+        cmap : matplotlib colormap (optional)
+            Colormap of the image. Default is grayscale.
+        """
+        Plot1D.__init__(self, title=title, xAutoRange=False, yAutoRange=False)
+        self.image = pg.ImageItem()
+        self.plot_object.addItem(self.image)
+        if cmap is not None:
+            lut = cmap(np.linspace(0, 1, 256))[:, :3] * 255
+            self.image.setLookupTable(lut.astype(np.uint8))
+
+    def set_image(self, zi, levels=None):
+        """Show zi, indexed [x, y], in place of the current image.
+
+        zi is not copied, so pixels changed in place are shown by calling this again. Pixels
+        which are nan are transparent.
+        """
+        if levels is None:
+            self.image.setImage(zi, autoLevels=True)
+        else:
+            low, high = levels
+            if not high > low:
+                high = low + 1
+            self.image.setImage(zi, autoLevels=False, levels=(low, high))
+
+    def set_extent(self, x, y):
+        """Place the image such that its pixel centers span x and y.
+
+        Parameters
+        ----------
+        x, y : tuple of float
+            Coordinates of the first and last pixel centers along each image axis, decreasing
+            coordinates flip the image.
+        """
+        nx, ny = self.image.width() or 1, self.image.height() or 1
+        dx = (x[1] - x[0]) / (nx - 1) if nx > 1 else 1.0
+        dy = (y[1] - y[0]) / (ny - 1) if ny > 1 else 1.0
+        self.image.setRect(QtCore.QRectF(x[0] - dx / 2, y[0] - dy / 2, dx * nx, dy * ny))
+        self.set_xlim(*sorted([x[0] - dx / 2, x[1] + dx / 2]))
+        self.set_ylim(*sorted([y[0] - dy / 2, y[1] + dy / 2]))
@@ -26,6 +26,7 @@ class Data(QtCore.QMutex):
         self.WaitCondition = QtCore.QWaitCondition()
         self.channels = {}
         self.signed = []
+        self.mapping_id = None
 
     def read(self):
         return self.channels
@@ -36,9 +37,10 @@ class Data(QtCore.QMutex):
         self.WaitCondition.wakeAll()
         self.unlock()
 
-    def write_properties(self, channels, signed=False):
+    def write_properties(self, channels, signed=False, mapping_id=None):
         self.lock()
         self.channels = channels
+        self.mapping_id = mapping_id
         self.signed = signed
         if not signed:
             self.signed = [False] * len(self.channels)
@@ -74,6 +76,10 @@ class Sensor(pc.Hardware):
     def channels(self):
         return self.data.channels
 
+    @property
+    def mapping_id(self):
+        return self.data.mapping_id
+
     def get_headers(self):
         out = collections.OrderedDict()
         return out
@@ -108,7 +114,6 @@ class Sensor(pc.Hardware):
 
     def wait_until_still(self):
         while self.busy.read():
-            print(f"{self.name} is busy")
             self.busy.wait_for_update()
 
 
@@ -150,13 +155,9 @@ class Driver(pc.Driver):
                     time.sleep(0.01)
             out = self.client.get_measured()
             del out["measurement_id"]
-            try:
-                del out["mapping_id"]
-            except KeyError:
-                # No mapping
-                pass
+            mapping_id = out.pop("mapping_id", None)  # None without mapping
             signed = [False for _ in out]
-            self.data.write_properties(out, signed)
+            self.data.write_properties(out, signed, mapping_id)
             self.busy.write(False)
         self.measure_time.write(timer.interval)
         self.update_ui.emit()
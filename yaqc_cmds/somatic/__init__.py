@@ -1,2 +1,3 @@
 from . import signals
+from . import _live
 from . import _wt5
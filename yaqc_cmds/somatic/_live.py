@@ -0,0 +1,102 @@
+"""In-memory view of the scan in progress, for live displays.
+
+The acquisition publishes every point here as it is acquired, so displays never need to read
+the data file, however and whenever it is written.
+"""
+
+
+import collections
+import threading
+
+import numpy as np
+
+import yaqc_cmds.somatic as somatic
+
+
+class LiveBuffer(object):
+    def __init__(self):
+        """Most recent points of the current scan, with running channel extents.
+
+        Points are kept in a ring buffer, older points are dropped once it is full.
+        """
+        self.shape = ()  # full scan shape
+        self.axes = {}  # {name: (values, units)}, values broadcast against channels
+        self.channels = {}  # {name: shape}
+        self.extents = {}  # {channel: (min, max)}, over every point of the scan
+        self.points = collections.deque(maxlen=1)  # (sequence number, point record)
+        self.count = 0
+        self.last_idx = None
+        self.lock = threading.Lock()
+
+    def start(self, shape, axes, channels, window=None):
+        """Forget the previous scan.
+
+        Parameters
+        ----------
+        shape : tuple of int
+            Full scan shape.
+        axes : dictionary
+            {name: (values, units)} of every axis, values broadcast against channels.
+        channels : dictionary
+            {name: shape} of every channel, including any dimensions beyond the scan.
+        window : int (optional)
+            Number of points kept. Default is the longest scan axis. Displays keep the points
+            they have drawn, the window covers those acquired between two frames and is replayed
+            when the display selection changes.
+        """
+        if not window:
+            window = max(shape, default=1)
+        with self.lock:
+            self.shape = tuple(shape)
+            self.axes = dict(axes)
+            self.channels = dict(channels)
+            self.extents = {}
+            self.points = collections.deque(maxlen=int(window))
+            self.count = 0
+            self.last_idx = None
+
+    def publish(self, point):
+        """Add a point record, as returned by WritePlan.snapshot."""
+        with self.lock:
+            for name, value in point["channels"].items():
+                value = np.asarray(value, dtype=float)
+                if not np.isfinite(value).any():
+                    continue
+                low, high = np.nanmin(value), np.nanmax(value)
+                if name in self.extents:
+                    low = min(low, self.extents[name][0])
+                    high = max(high, self.extents[name][1])
+                self.extents[name] = (low, high)
+            for name, value in point["mappings"].items():
+                if name in self.axes:
+                    values, units = self.axes[name]
+                    self.axes[name] = (np.reshape(value, values.shape), units)
+            self.points.append((self.count, point))
+            self.count += 1
+            self.last_idx = point["idx"]
+        somatic.signals.live_updated.emit()
+
+    def since(self, count):
+        """Point records published after the first count points of the scan.
+
+        Returns
+        -------
+        list or None
+            Records in acquisition order, None if some of them are no longer kept.
+        int
+            Count of points published, to pass next time.
+        """
+        recent = tuple(self.points)  # copied at once, the acquisition may publish meanwhile
+        if not recent:
+            return [], count
+        total = recent[-1][0] + 1
+        if recent[0][0] > count:
+            return None, total
+        return [point for n, point in recent if n >= count], total
+
+    def recent(self):
+        """Every point record kept, in acquisition order."""
+        return [point for _, point in tuple(self.points)]
+
+
+live_buffer = LiveBuffer()
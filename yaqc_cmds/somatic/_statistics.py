@@ -0,0 +1,41 @@
+"""Streaming statistics of repeated shots at a single scan point."""
+
+
+import numpy as np
+
+
+class Statistics:
+    def __init__(self):
+        """Running mean and variance of every channel, using Welford's online update."""
+        self.count = 0
+        self.mean = {}
+        self._m2 = {}
+
+    def stderr(self):
+        """Standard error of the mean of every channel, nan until there are two shots."""
+        out = {}
+        for ch, m2 in self._m2.items():
+            if self.count < 2:
+                out[ch] = np.full(np.shape(m2), np.nan)[()]
+            else:
+                out[ch] = np.sqrt(m2 / (self.count - 1) / self.count)
+        return out
+
+    def update(self, channels):
+        """Add a single shot, channels being {name: value} of every channel measured."""
+        self.count += 1
+        for ch, val in channels.items():
+            val = np.asarray(val, dtype=float)
+            if ch not in self.mean:
+                self.mean[ch] = np.zeros(val.shape)
+                self._m2[ch] = np.zeros(val.shape)
+            delta = val - self.mean[ch]
+            self.mean[ch] = self.mean[ch] + delta / self.count
+            self._m2[ch] = self._m2[ch] + delta * (val - self.mean[ch])
+
+    def add_shot(self, sensors):
+        """Add a single shot of every sensor, counted once."""
+        channels = {}
+        for s in sensors:
+            channels.update(s.channels)
+        self.update(channels)
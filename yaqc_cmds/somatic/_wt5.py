@@ -1,40 +1,204 @@
 """wt5 data file functions"""
 
 
+import atexit
+import queue
 import time
 import threading
 
 import h5py
+import numpy as np
 import WrightTools as wt
 
+import yaqc_cmds.__main__
 import yaqc_cmds.project.project_globals as g
 import yaqc_cmds.somatic as somatic
+from yaqc_cmds.somatic._live import live_buffer
 
 
 class DataContainer(object):
     def __init__(self):
+        """Access to the current data file.
+
+        During a scan the file is kept open (see open), otherwise it is opened on entry and
+        closed on exit. Nothing else in this process reads the file during a scan, the live
+        displays read the live buffer instead, so the lock only serializes the acquisition
+        thread with processing after the scan. Other processes can follow a scan in SWMR mode.
+        """
         self._data = None
+        self._persistent = False
+        self.plan = None  # WritePlan of the open scan, see create_data
         self.data_filepath = None
         self.last_idx_written = None
         self.lock = threading.RLock()
 
     def __enter__(self):
         self.lock.acquire()
-        if self.data_filepath:
+        if self._data is None and self.data_filepath:
             self._data = wt.open(self.data_filepath, edit_local=True)
         return self._data
 
     def __exit__(self, exc_type, exc_value, traceback):
-        if self._data:
+        if self._data is not None and not self._persistent:
             self._data.close()
-        self._data = None
+            self._data = None
         self.lock.release()
 
+    def open(self, data):
+        """Keep data open until close is called, closing whatever was open before."""
+        with self.lock:
+            self.close()
+            self._data = data
+            self._persistent = True
+            self.last_idx_written = None
+
+    def flush(self):
+        """Flush the open file to disk, if any."""
+        with self.lock:
+            if self._data is not None:
+                self._data.flush()
+
+    def close(self):
+        """Flush and close the open file, if any."""
+        with self.lock:
+            if self._data is not None:
+                try:
+                    self._data.flush()
+                finally:
+                    self._data.close()
+            self._data = None
+            self._persistent = False
+            self.plan = None
+
 
 data_container = DataContainer()
+atexit.register(data_container.close)  # never leave a scan file open
+
+
+def storage_kwargs(shape, dtype, storage, order=None):
+    """Dataset creation keyword arguments for h5py, from storage options.
+
+    Parameters
+    ----------
+    shape : tuple of int
+        Dataset shape.
+    dtype : numpy.dtype
+        Dataset dtype.
+    storage : dictionary
+        Storage options, all optional:
+        compression ('gzip', 'lzf' or 'none', default 'none'),
+        compression_opts (gzip level, default 4),
+        shuffle (default true when compressing),
+        chunk_kb (target chunk size, default is h5py's guess),
+        channel_dtype and variable_dtype (default 'float64'),
+        swmr (default true, see create_data).
+    order : list of int (optional)
+        Axes from fastest to slowest, see chunk_shape.
+
+    Returns
+    -------
+    dictionary
+        Empty if the defaults apply.
+    """
+    out = {}
+    if np.prod(shape) <= 1:
+        return out  # stored contiguously
+    compression = storage.get("compression", "none")
+    if compression not in ["gzip", "lzf", "none"]:
+        raise ValueError(f"compression must be 'gzip', 'lzf' or 'none', got '{compression}'")
+    if compression != "none":
+        out["compression"] = compression
+        if compression == "gzip":
+            out["compression_opts"] = storage.get("compression_opts", 4)
+        out["shuffle"] = storage.get("shuffle", True)
+    if storage.get("chunk_kb"):
+        itemsize = np.dtype(dtype).itemsize
+        out["chunks"] = chunk_shape(shape, itemsize, storage["chunk_kb"] * 1024, order)
+    return out
+
+
+def chunk_shape(shape, itemsize, nbytes, order=None):
+    """Chunks of about nbytes, spanning the fastest axes first.
+
+    Points are written in runs along the fastest scan axis of the acquisition order, so chunks
+    aligned with those runs are written whole rather than partially.
+
+    Parameters
+    ----------
+    order : list of int (optional)
+        Axes from fastest to slowest, see axes_order. Default is the last axis fastest.
+    """
+    chunks = [1] * len(shape)
+    size = itemsize
+    if order is None:
+        order = list(reversed(range(len(shape))))
+    for i in order:
+        n = max(1, min(shape[i], nbytes // size))
+        chunks[i] = int(n)
+        size *= n
+        if n < shape[i]:
+            break
+    return tuple(chunks)
+
 
+def axes_order(ndim, nscan, fast=None):
+    """Axes of a dataset from fastest to slowest, as points are written.
 
-def create_data(path, headers, destinations, axes, constants, hardware, sensors):
+    Dimensions beyond the scan (e.g. of array detectors) are written whole, then points follow
+    the fast axis of the acquisition order (default last), then the other scan axes.
+
+    Parameters
+    ----------
+    ndim : int
+        Dataset dimensions.
+    nscan : int
+        Scan dimensions, the leading ones.
+    fast : int (optional)
+        Fastest scan axis.
+    """
+    if fast is None:
+        fast = nscan - 1
+    others = [axis for axis in reversed(range(nscan)) if axis != fast]
+    return list(reversed(range(nscan, ndim))) + [fast] + others
+
+
+def _require_dataset(data, name, shape, dtype, storage, maxshape=None, order=None):
+    # wt creates its datasets with require_dataset, which adopts compatible existing ones
+    if maxshape is not None and tuple(maxshape) != tuple(shape):
+        # resizable up to maxshape, see WritePlan.expand
+        kwargs = storage_kwargs(maxshape, dtype, storage, order)
+        if "chunks" not in kwargs:
+            # about one run along the fastest resizable axis, so a broadcast value stays small
+            if order is None:
+                order = list(reversed(range(len(shape))))
+            resizable = [i for i in order if shape[i] != maxshape[i]]
+            run = order[: order.index(resizable[0]) + 1]
+            itemsize = np.dtype(dtype).itemsize
+            nbytes = min(int(np.prod([maxshape[i] for i in run])) * itemsize, 64 * 1024)
+            kwargs["chunks"] = chunk_shape(maxshape, itemsize, nbytes, order)
+        data.create_dataset(
+            name, shape=shape, maxshape=maxshape, dtype=dtype, fillvalue=np.nan, **kwargs
+        )
+        return
+    kwargs = storage_kwargs(shape, dtype, storage, order)
+    if kwargs:
+        data.create_dataset(name, shape=shape, dtype=dtype, fillvalue=np.nan, **kwargs)
+
+
+def create_data(
+    path,
+    headers,
+    destinations,
+    axes,
+    constants,
+    hardware,
+    sensors,
+    shots=1,
+    storage=None,
+    live_window=None,
+    tables=None,
+    fast_axis=None,
+):
     """Create new data object.
 
     Parameters
@@ -44,7 +208,8 @@ def create_data(path, headers, destinations, axes, constants, hardware, sensors)
     headers : dictionary
         Metadata
     destinations : list of yaqc_cmds.acquisition.Destination objects
-        New scan destinations.
+        New scan destinations. Variables recorded by hardware which is not moved by any of them
+        are stored once, broadcast along the scan, until their values change.
     axes : list of yaqc_cmds.acqusition.Axis objects
         New scan axes.
     constants : list of yaqc_cmds.acquisition.Constant objects
@@ -53,13 +218,35 @@ def create_data(path, headers, destinations, axes, constants, hardware, sensors)
         all active hardware
     sensors: list of yaqc_cmds._sensors.Sensor objects
         all active sensors
+    shots : int (optional)
+        Shots averaged at each point. If more than one, a sibling standard error channel
+        ({channel}_stderr) is created for every channel. Default is 1.
+    storage : dictionary (optional)
+        Storage options, see storage_kwargs. Default is the [data] section of the system config.
+        Unless swmr is false, the file is left in SWMR mode, so other processes can follow the
+        scan with h5py.File(path, "r", libver="latest", swmr=True).
+    live_window : int (optional)
+        Points kept in memory for live displays, see LiveBuffer.start.
+    tables : dictionary (optional)
+        {name: column names} of 2D tables stored alongside the variables and channels, created
+        empty and grown by append_rows. Default is None.
+    fast_axis : int (optional)
+        Scan axis along which consecutive points move in the acquisition order. Chunks and
+        batched writes follow it. Default is the last axis.
+
+    Returns
+    -------
+    WritePlan
+        Records and writes points, valid until the data file is closed.
     """
-    f = h5py.File(path, "w")
+    if storage is None:
+        storage = yaqc_cmds.__main__.config.get("data", {})
+    swmr = storage.get("swmr", True)
+    f = h5py.File(path, "w", libver="latest" if swmr else None)
     global data_container
+    data_container.open(wt.Data(f, name=headers["name"], edit_local=True))
+    data_container.data_filepath = path
     with data_container as data:
-        data = wt.Data(f, name=headers["name"], edit_local=True)
-        data_container.data_filepath = path
-
         # fill out yaqc_cmds_information in headers
         headers["Yaqc_cmds version"] = g.version.read()
         headers["system name"] = g.system_name.read()
@@ -68,6 +255,7 @@ def create_data(path, headers, destinations, axes, constants, hardware, sensors)
 
         full_scan_shape = tuple(a.points.size for a in axes)
         variable_shapes = {"labtime": full_scan_shape}
+        variable_maxshapes = {}  # resizable variables, stored broadcast until they vary
         variable_units = {"labtime": "s"}
         variable_labels = {}
 
@@ -82,9 +270,15 @@ def create_data(path, headers, destinations, axes, constants, hardware, sensors)
                 variable_shapes[f"{axis.name}_centers"] = tuple(shape)
                 variable_units[f"{axis.name}_centers"] = axis.units
 
+        # hardware which the scan does not move is stored broadcast, until its values vary
+        moved = [d.hardware for d in destinations or []]
         for hw in hardware:
             for rec, (_, units, _, label, _) in hw.recorded.items():
-                variable_shapes[rec] = full_scan_shape
+                if any(hw is m for m in moved):
+                    variable_shapes[rec] = full_scan_shape
+                else:
+                    variable_shapes[rec] = (1,) * len(full_scan_shape)
+                    variable_maxshapes[rec] = full_scan_shape
                 variable_units[rec] = units
                 variable_labels[rec] = label
 
@@ -93,6 +287,8 @@ def create_data(path, headers, destinations, axes, constants, hardware, sensors)
         channel_signs = {}
 
         transform_extras = []
+        mappings_written = {}
+        mapping_ids = {}
 
         for sensor in sensors:
             # TODO allow sensors to be inactive
@@ -109,6 +305,7 @@ def create_data(path, headers, destinations, axes, constants, hardware, sensors)
                 variable_units.update(sensor.driver.client.get_mapping_units())
                 channel_units.update(sensor.driver.client.get_channel_units())
                 mappings = sensor.driver.client.get_mappings()
+                mapping_ids[sensor.name] = mappings.get("mapping_id")
 
                 while chs_left:
                     chs_broad = [chs_left.pop()]
@@ -121,11 +318,15 @@ def create_data(path, headers, destinations, axes, constants, hardware, sensors)
                             chs_left.remove(ch)
                     for k, v in variable_shapes.items():
                         variable_shapes[k] = v + (1,) * ndim
+                    for k, v in variable_maxshapes.items():
+                        variable_maxshapes[k] = v + (1,) * ndim
                     for k, v in channel_shapes.items():
                         channel_shapes[k] = v + (1,) * ndim
-                    variable_shapes.update(
-                        {m: full_scan_shape + mappings[m].shape for m in maps_broad}
-                    )
+                    # mappings are written once, broadcast along the scan
+                    for m in maps_broad:
+                        variable_shapes[m] = (1,) * len(full_scan_shape) + mappings[m].shape
+                        variable_maxshapes[m] = full_scan_shape + mappings[m].shape
+                        mappings_written[m] = mappings[m]
                     transform_extras.extend(maps_broad)
                     channel_shapes.update(
                         {ch: full_scan_shape + tuple(shapes[ch]) for ch in chs_broad}
@@ -139,13 +340,23 @@ def create_data(path, headers, destinations, axes, constants, hardware, sensors)
                     # TODO: channel units?
                     channel_units[ch] = None
 
+        # labtime and axis points keep full precision, whatever the storage options
+        exact = ["labtime"]
+        exact += [f"{a.name}_points" for a in axes] + [f"{a.name}_centers" for a in axes]
         for var, sh in variable_shapes.items():
             units = variable_units[var]
             label = variable_labels.get(var)
+            dtype = np.dtype(
+                "float64" if var in exact else storage.get("variable_dtype", "float64")
+            )
+            order = axes_order(len(sh), len(axes), fast_axis)
+            _require_dataset(
+                data, var, sh, dtype, storage, variable_maxshapes.get(var), order=order
+            )
             if label:
-                data.create_variable(var, shape=sh, units=units, label=label)
+                data.create_variable(var, shape=sh, units=units, dtype=dtype, label=label)
             else:
-                data.create_variable(var, shape=sh, units=units)
+                data.create_variable(var, shape=sh, units=units, dtype=dtype)
 
         for axis in axes:
             sh = data[f"{axis.name}_points"].shape
@@ -153,6 +364,8 @@ def create_data(path, headers, destinations, axes, constants, hardware, sensors)
             if hasattr(axis, "centers"):
                 sh = data[f"{axis.name}_centers"].shape
                 data[f"{axis.name}_centers"][:] = axis.centers.reshape(sh)
+        for m, value in mappings_written.items():
+            data[m][...] = np.reshape(value, data[m].shape)
 
         # This check was originally if there was _centers_ use the points arrays
         # This was changed to always use the points arrays (except for the array detector)
@@ -163,45 +376,400 @@ def create_data(path, headers, destinations, axes, constants, hardware, sensors)
         transform.extend(transform_extras)
         data.transform(*transform)
 
+        if shots > 1:
+            for ch in list(channel_shapes):
+                channel_shapes[f"{ch}_stderr"] = channel_shapes[ch]
+                channel_units[f"{ch}_stderr"] = channel_units[ch]
+        data.attrs["shots"] = shots
+
         for ch, sh in channel_shapes.items():
             units = channel_units[ch]
-            data.create_channel(ch, shape=sh, units=units, signed=channel_signs.get(ch, False))
+            dtype = np.dtype(storage.get("channel_dtype", "float64"))
+            _require_dataset(
+                data, ch, sh, dtype, storage, order=axes_order(len(sh), len(axes), fast_axis)
+            )
+            data.create_channel(
+                ch, shape=sh, units=units, dtype=dtype, signed=channel_signs.get(ch, False)
+            )
             # TODO signed?
             # TODO labels?
 
+        for name, columns in (tables or {}).items():
+            dataset = data.create_dataset(
+                name,
+                shape=(0, len(columns)),
+                maxshape=(None, len(columns)),
+                chunks=(1024, len(columns)),
+                dtype="float64",
+            )
+            dataset.attrs["columns"] = columns
+
+        scan_shape = tuple(a.points.size for a in axes)
+        live_buffer.start(
+            scan_shape,
+            {name: (data[name][...], variable_units[name]) for name in transform},
+            channel_shapes,
+            live_window,
+        )
+        plan = WritePlan(
+            data, scan_shape, hardware, sensors, mappings_written, mapping_ids, tables, fast_axis
+        )
+        data_container.plan = plan
+        if swmr:
+            # no objects or attributes may be created from here on
+            f.swmr_mode = True
         somatic.signals.data_file_created.emit()
+    return plan
+
+
+class WritePlan:
+    def __init__(
+        self,
+        data,
+        shape,
+        hardware,
+        sensors,
+        mappings=None,
+        mapping_ids=None,
+        tables=None,
+        fast_axis=None,
+    ):
+        """Everything needed to record and write scan points, looked up once per scan.
+
+        Returned by create_data. Dataset handles are valid while the data file stays open.
+
+        Parameters
+        ----------
+        data : WrightTools.Data
+            Open data, as created by create_data.
+        shape : tuple of int
+            Full scan shape.
+        hardware: list of yaqc_cmds.hardware.Hardware objects
+            all active hardware
+        sensors: list of yaqc_cmds._sensors.Sensor objects
+            all active sensors
+        mappings : dictionary (optional)
+            Mapping values already written, broadcast along the scan.
+        mapping_ids : dictionary (optional)
+            mapping_id of each mapped sensor, as written.
+        tables : iterable of strings (optional)
+            Names of the tables created by create_data.
+        fast_axis : int (optional)
+            Scan axis along which points are written in runs. Default is the last axis.
+        """
+        self.shape = tuple(shape)
+        self.fast_axis = len(self.shape) - 1 if fast_axis is None else fast_axis
+        self.sensors = sensors
+        self.mapped = [s for s in sensors if "has-mapping" in s.driver.client.traits]
+        # [(name, object, units)], units as recorded
+        self.recorded = []
+        for hw in hardware:
+            for rec, (obj, units, *_) in hw.recorded.items():
+                self.recorded.append((rec, obj, units))
+        # {name: (dataset, trailing shape)}, trailing dimensions follow the scan axes
+        self.datasets = {}
+        for name in data.variable_names + data.channel_names:
+            dataset = h5py.Dataset(data[name].id)
+            self.datasets[name] = (dataset, dataset.shape[len(self.shape) :])
+        # {name: dataset} of tables, see append_rows
+        self.tables = {name: h5py.Dataset(data[name].id) for name in tables or []}
+        # {mapping name: value}, {sensor name: mapping_id}
+        self.mappings = dict(mappings or {})
+        self._mapping_ids = dict(mapping_ids or {})
+        # {name: value} of recorded variables stored broadcast, written once here
+        self.static = {}
+        for rec, obj, units in self.recorded:
+            dataset, trailing = self.datasets[rec]
+            if dataset.shape != self.shape + trailing:
+                self.static[rec] = self.read(obj, units)
+                dataset[...] = self.static[rec]
+        # static variables and mappings which changed during the scan, recorded at every point
+        # from then on
+        self.varying = set()
+
+    def refresh_mappings(self, sensor):
+        """Request mappings of sensor again if its mapping_id changed, noting any which vary."""
+        mapping_id = sensor.mapping_id
+        if mapping_id is not None and mapping_id == self._mapping_ids.get(sensor.name):
+            return
+        mappings = sensor.driver.client.get_mappings()
+        mappings.pop("mapping_id", None)
+        self._mapping_ids[sensor.name] = mapping_id
+        for name, value in mappings.items():
+            if name in self.mappings and not np.array_equal(value, self.mappings[name]):
+                self.varying.add(name)
+            self.mappings[name] = value
+
+    def expand(self, name):
+        """Resize a variable stored broadcast along the scan to the full scan shape.
+
+        Points already written take the value stored so far, until written otherwise. Points
+        not written yet (nan labtime) stay nan, also if never acquired.
+        """
+        dataset, trailing = self.datasets[name]
+        shape = self.shape + trailing
+        if dataset.shape == shape:
+            return
+        value = dataset[...]
+        written = np.isfinite(self.datasets["labtime"][0][...])
+        written = written.reshape(self.shape + (1,) * len(trailing))
+        dataset.resize(shape)
+        dataset[...] = np.where(written, np.broadcast_to(value, shape), np.nan)
+
+    def snapshot(self, idx):
+        """Collect everything recorded at a single scan point, without touching the file.
+
+        Parameters
+        ----------
+        idx : tuple of int
+            Index of the point within the full scan shape.
+
+        Returns
+        -------
+        dict
+            Point record, suitable for write_snapshot.
+        """
+        point = {
+            "idx": idx,
+            "labtime": time.time(),
+            "variables": {},
+            "channels": {},
+            "mappings": {},
+        }
+        for rec, obj, units in self.recorded:
+            value = self.read(obj, units)
+            if rec in self.static and rec not in self.varying:
+                if _same(value, self.static[rec]):
+                    continue
+                self.varying.add(rec)
+            point["variables"][rec] = value
+        for s in self.sensors:
+            point["channels"].update(s.channels)
+        for s in self.mapped:
+            self.refresh_mappings(s)
+        for name in self.varying:
+            if name in self.mappings:
+                point["mappings"][name] = self.mappings[name]
+        return point
+
+    @staticmethod
+    def read(obj, units):
+        """Current value of a recorded object, in the units it is recorded in."""
+        value = obj.value.read()
+        if units is not None and obj.units is not None and obj.units != units:
+            value = wt.units.converter(value, obj.units, units)
+        return value
+
+    def write(self, points):
+        """Write point records into the data file, see write_snapshots."""
+        runs = list(_runs(points, self.fast_axis))
+        for run in runs:
+            self._write(run, "labtime", [p["labtime"] for p in run])
+            for name in run[0]["channels"]:
+                self._write(run, name, [p["channels"][name] for p in run])
+        # static variables and mappings are only recorded from the point they vary, once every
+        # labtime is written, see expand
+        for run in runs:
+            for key in ["variables", "mappings"]:
+                for name in set().union(*[p[key] for p in run]):
+                    self.expand(name)
+                    has = [p for p in run if name in p[key]]
+                    for sub in [run] if len(has) == len(run) else _runs(has, self.fast_axis):
+                        self._write(sub, name, [p[key][name] for p in sub])
+
+    def _write(self, run, name, values):
+        dataset, trailing = self.datasets[name]
+        idx, axis = run[0]["idx"], self.fast_axis
+        selection = idx[:axis] + (slice(idx[axis], idx[axis] + len(run)),) + idx[axis + 1 :]
+        dataset[selection] = np.reshape(np.asarray(values), (len(values),) + trailing)
+
+
+def _same(a, b):
+    return a == b or (a != a and b != b)  # nan is nan
+
+
+def _runs(points, axis=-1):
+    """Group point records into runs along axis, the last by default, in index order.
+
+    Each run is a list of records sharing all but their index along axis, which is consecutive.
+    """
 
+    def key(point):
+        # (index along every other axis, index along axis)
+        idx = list(point["idx"])
+        position = idx.pop(axis)
+        return tuple(idx), position
+
+    run = []
+    for point in sorted(points, key=key):
+        if run:
+            others, position = key(point)
+            last_others, last_position = key(run[-1])
+            if others != last_others or position != last_position + 1:
+                yield run
+                run = []
+        run.append(point)
+    if run:
+        yield run
+
+
+def write_snapshots(points):
+    """Write point records, as returned by WritePlan.snapshot, into the open data file.
+
+    Points which are consecutive along the fast axis are written together, with a single
+    write per dataset. Nothing is flushed, see DataContainer.flush.
+    """
+    global data_container
+    if not points:
+        return
+    with data_container:
+        data_container.plan.write(points)
+        data_container.last_idx_written = points[-1]["idx"]
+
+
+def write_snapshot(point):
+    """Write a single point record, see write_snapshots."""
+    write_snapshots([point])
+
+
+class PointBuffer:
+    policies = ["point", "points", "seconds", "slice"]
+
+    def __init__(self, policy="point", count=100, period=1.0):
+        """Point records waiting to be written, in batches.
+
+        Parameters
+        ----------
+        policy : {'point', 'points', 'seconds', 'slice'} (optional)
+            When to write and flush: after every point, every count points, every period
+            seconds, or at the end of every slice. Default is 'point'.
+        count : int (optional)
+            Points per batch for the 'points' policy. Default is 100.
+        period : number (optional)
+            Seconds between batches for the 'seconds' policy. Default is 1.
+        """
+        if policy not in self.policies:
+            raise ValueError(f"flush policy must be one of {self.policies}, got '{policy}'")
+        self.policy = policy
+        self.count = max(int(count), 1)
+        self.period = period
+        self.points = []
+        self.last_flush = time.time()
+
+    def append(self, point):
+        """Buffer a point record, writing and flushing when due.
+
+        Returns
+        -------
+        bool
+            True if the buffer was written.
+        """
+        self.points.append(point)
+        if self.policy == "points":
+            due = len(self.points) >= self.count
+        elif self.policy == "seconds":
+            due = time.time() - self.last_flush >= self.period
+        elif self.policy == "slice":
+            due = point.get("slice end", True)
+        else:
+            due = True
+        if due:
+            self.flush()
+        return due
+
+    def flush(self):
+        """Write everything buffered, and flush the file."""
+        points, self.points = self.points, []
+        write_snapshots(points)
+        data_container.flush()
+        self.last_flush = time.time()
+
+
+class Writer:
+    def __init__(self, buffer, maxsize=256, written=None):
+        """Write point records from a background thread, fed by a bounded queue.
+
+        Parameters
+        ----------
+        buffer : PointBuffer
+            Decides when records are written.
+        maxsize : int (optional)
+            Records waiting in the queue before put blocks. Default is 256.
+        written : callable (optional)
+            Called from the writer thread with the index of the last record written, each time
+            the buffer is written. Default is None.
+        """
+        self.buffer = buffer
+        self.written = written
+        self.queue = queue.Queue(maxsize)
+        self.error = None
+        self._reported = False
+        self.thread = threading.Thread(target=self._run, name="wt5 writer", daemon=True)
+        self.thread.start()
+
+    def _raise(self):
+        if self.error is not None and not self._reported:
+            self._reported = True
+            raise self.error
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    if self.error is None:
+                        self.buffer.flush()
+                    return
+                if self.error is None:
+                    i, point = item
+                    if self.buffer.append(point) and self.written is not None:
+                        self.written(i)
+            except BaseException as error:
+                # keep consuming, so that put never blocks on a dead writer
+                self.error = error
+            finally:
+                self.queue.task_done()
+
+    def put(self, i, point):
+        """Enqueue (index, point record), blocking while the queue is full.
+
+        Raises whatever error the writer thread hit since, once.
+        """
+        self._raise()
+        self.queue.put((i, point))
+
+    def close(self):
+        """Write everything enqueued, flush, and stop the thread.
+
+        Raises whatever error the writer thread hit, if not raised by put already.
+        """
+        self.queue.put(None)
+        self.thread.join()
+        self._raise()
+
+
+def append_rows(name, rows):
+    """Append rows to a table of the open data file, see create_data.
+
+    Nothing is flushed, see DataContainer.flush.
 
-def write_data(idx, hardware, sensors):
+    Parameters
+    ----------
+    name : string
+        Table name.
+    rows : 2D array
+        Rows of values, one column per column name of the table.
+    """
     global data_container
-    with data_container as data:
-        in_idx = idx
-        idx = idx + (...,)
-        data["labtime"][idx] = time.time()
-        for hw in hardware:
-            for rec, (obj, *_) in hw.recorded.items():
-                data[rec][idx] = obj.read(data[rec].units)
-        for s in sensors:
-            if "has-mapping" in s.driver.client.traits:
-                for ch, val in s.channels.items():
-                    idx_ch = list(data[ch].shape)
-                    print(idx_ch)
-                    idx_ch = [slice(None) if i != 1 else 1 for i in idx_ch]
-                    idx_ch[: len(in_idx)] = in_idx
-                    idx_ch = tuple(idx_ch)
-                    print(data[ch].shape, idx_ch, val.shape)
-                    data[ch][idx_ch] = val
-                for var, val in s.driver.client.get_mappings().items():
-                    if var == "mapping_id":
-                        continue
-                    idx_map = list(data[var].shape)
-                    idx_map = [slice(None) if i != 1 else 1 for i in idx_map]
-                    idx_map[: len(in_idx)] = in_idx
-                    idx_map = tuple(idx_map)
-                    print(data[var].shape, idx_map, val.shape)
-                    data[var][idx_map] = val
-            else:
-                for ch, val in s.channels.items():
-                    data[ch][idx] = val
-        data.flush()
-        data_container.last_idx_written = in_idx
+    if not len(rows):
+        return
+    with data_container:
+        dataset = data_container.plan.tables[name]
+        n = dataset.shape[0]
+        dataset.resize(n + len(rows), axis=0)
+        dataset[n:] = rows
+
+
+def write_data(idx, hardware=None, sensors=None):
+    # hardware and sensors are fixed by create_data, see WritePlan
+    write_snapshot(data_container.plan.snapshot(idx))
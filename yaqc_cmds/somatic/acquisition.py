@@ -18,8 +18,6 @@ import appdirs
 import toml
 import numpy as np
 
-import numexpr
-
 from PySide2 import QtCore, QtWidgets
 
 import WrightTools as wt
@@ -32,13 +30,22 @@ import yaqc_cmds.hardware.delays as delays
 import yaqc_cmds.hardware.opas as opas
 import yaqc_cmds.hardware.filters as filters
 
-from yaqc_cmds.somatic._wt5 import create_data, write_data
-from yaqc_cmds.somatic.order import ndindex as order
+from yaqc_cmds.somatic._wt5 import (
+    append_rows,
+    create_data,
+    data_container,
+    PointBuffer,
+    Writer,
+)
+from yaqc_cmds.somatic._live import live_buffer
+from yaqc_cmds.somatic._statistics import Statistics
+from yaqc_cmds.somatic import order
 from .signals import data_file_written
 
 all_hardwares = opas.hardwares + spectrometers.hardwares + delays.hardwares + filters.hardwares
 
 from . import constant_resolver
+from . import lazy
 
 
 ### define ####################################################################
@@ -46,6 +53,9 @@ from . import constant_resolver
 
 __here__ = pathlib.Path(__file__).parent
 
+# recorded for every scan point, in seconds
+phases = ["dispatch", "hardware wait", "sensor measure", "sensor wait", "write", "ui"]
+
 
 ### container objects #########################################################
 
@@ -77,12 +87,62 @@ class Constant:
 
 
 class Destinations:
-    def __init__(self, arr, units, hardware, method, passed_args):
-        self.arr = arr  # full scan shape
+    def __init__(self, arr, units, hardware, method, passed_args, axis=None):
+        self.arr = arr  # full scan shape, may be lazily evaluated
         self.units = units
         self.hardware = hardware
         self.method = method
         self.passed_args = passed_args
+        self.axis = axis  # index of the scan axis driving these destinations, if any
+
+
+def check_limits(destinations_list):
+    """Check every destination against the limits of its hardware.
+
+    Destinations are evaluated, converted and compared in vectorized chunks, so memory does not
+    scale with the number of points. Destinations not set through set_position (e.g.
+    individual motors) are not checked.
+
+    Parameters
+    ----------
+    destinations_list : list of Destinations objects
+        All destinations of the scan.
+
+    Returns
+    -------
+    list of (Destinations, 1D integer array) tuples
+        Destinations with points out of limits, each with the flat (C order) indices of its
+        invalid points.
+    """
+    shape = destinations_list[-1].arr.shape
+    checked = []
+    for d in destinations_list:
+        if d.method != "set_position":
+            continue
+        hardware = d.hardware
+        checked.append((d, hardware.limits.read(hardware.native_units), []))
+    start = 0
+    for idx_arrays in order.Indices(shape).chunks():
+        for d, (min_value, max_value), invalid in checked:
+            arr = d.arr[idx_arrays]
+            if d.units is not None:
+                arr = wt.units.converter(arr, d.units, d.hardware.native_units)
+            invalid.append(start + np.flatnonzero((arr < min_value) | (arr > max_value)))
+        start += idx_arrays[0].size
+    report = []
+    for d, _, invalid in checked:
+        invalid = np.concatenate(invalid) if invalid else np.array([], dtype=int)
+        if invalid.size:
+            report.append((d, invalid))
+    return report
+
+
+def clip_to_limits(report):
+    """Replace invalid destinations (see check_limits) with the nearest limit."""
+    for d, _ in report:
+        hardware = d.hardware
+        limits = hardware.limits.read(hardware.native_units)
+        d.arr = lazy.ClippedArray(d.arr, d.units, limits, hardware.native_units)
 
 
 ### Worker base ##############################################################
@@ -128,11 +188,77 @@ class Worker(QtCore.QObject):
         self.scan_index = None
         self.scan_folders = []
         self.scan_urls = []
+        self.timing = None  # rows not yet appended to the timing table, see finish_point
+        self.timing_count = 0
+        self.buffer = None
+        self.writer = None
+
+    def finish_point(self, point, i, npts):
+        # do not overload this method
+        timer = wt.kit.Timer(verbose=False)
+        with timer:
+            if self.writer is None:
+                written = self.buffer.append(point)
+            else:
+                # only waits when the writer falls behind, it announces points itself
+                self.writer.put(i, point)
+                written = False
+        point["timing"]["write"] = timer.interval
+        with timer:
+            live_buffer.publish(point)
+            if written and i != npts - 1:
+                data_file_written.emit()
+            self.fraction_complete.write(i / npts)
+            self.update_ui.emit()
+        point["timing"]["ui"] = timer.interval
+        row = self.timing[self.timing_count]
+        row[: len(point["idx"])] = point["idx"]
+        row[len(point["idx"])] = point["timing"]["start"]
+        row[len(point["idx"]) + 1 :] = [point["timing"][p] for p in phases]
+        self.timing_count += 1
+        if self.timing_count == len(self.timing):
+            self.flush_timing()
+
+    def flush_timing(self):
+        # do not overload this method
+        append_rows("timing", self.timing[: self.timing_count])
+        self.timing_count = 0
 
     def process(self, scan_folder):
         # By default, nothing to do
         return
 
+    def read_option(self, option, default=None):
+        """Read an optional setting from the [acquisition] section of the aqn file."""
+        if self.aqn.has_option("acquisition", option):
+            return self.aqn.read("acquisition", option)
+        return default
+
+    def save_timing(self, scan_folder, elapsed):
+        # do not overload this method
+        # summarized from the timing table, one column at a time
+        with data_container as data:
+            table = data["timing"]
+            npts = table.shape[0]
+            if not npts:
+                return
+            ndim = table.shape[1] - len(phases) - 1
+            summary = {"points": npts, "elapsed": elapsed, "points per second": 0.0}
+            if elapsed > 0:
+                summary["points per second"] = npts / elapsed
+            for i, phase in enumerate(phases):
+                durations = table[:, ndim + 1 + i]
+                summary[phase] = {
+                    "total": float(np.sum(durations)),
+                    "mean": float(np.mean(durations)),
+                    "p50": float(np.percentile(durations, 50)),
+                    "p90": float(np.percentile(durations, 90)),
+                    "p99": float(np.percentile(durations, 99)),
+                    "max": float(np.max(durations)),
+                }
+        with open(pathlib.Path(scan_folder) / "timing.toml", "w") as f:
+            toml.dump(summary, f)
+
     def scan(
         self,
         axes,
@@ -149,69 +275,65 @@ class Worker(QtCore.QObject):
         else:
             self.scan_index += 1
         # create destination objects ------------------------------------------
-        # get destination arrays
-        if len(axes) == 1:
-            arrs = [axes[0].points]
-        else:
-            arrs = np.meshgrid(*[a.points for a in axes], indexing="ij")
-        # treat 'scan about center' axes
-        for axis_index, axis in enumerate(axes):
-            if hasattr(axis, "centers"):
-                centers = axis.centers
-                # transpose so own index is first (all others slide down)
-                transpose_order = list(range(len(axes)))
-                transpose_order.insert(0, transpose_order.pop(axis_index))
-                arrs[axis_index] = np.transpose(arrs[axis_index], axes=transpose_order)
-                # add centers to transposed array
-                arrs[axis_index] += centers
-                # transpose out
-                transpose_order = list(range(len(axes)))
-                transpose_order.insert(axis_index, transpose_order.pop(0))
-                arrs[axis_index] = np.transpose(arrs[axis_index], axes=transpose_order)
-        # create destination objects
+        shape = tuple(a.points.size for a in axes)
         destinations_list = []
-        for i in range(len(axes)):
-            axis = axes[i]
-            arr = arrs[i]
+        for i, axis in enumerate(axes):
+            # destinations are evaluated lazily, 'scan about center' axes add their centers
+            arr = lazy.AxisArray(axis.points, i, shape, getattr(axis, "centers", None))
             for key in axis.hardware_dict.keys():
                 hardware = axis.hardware_dict[key][0]
                 method = axis.hardware_dict[key][1]
                 passed_args = axis.hardware_dict[key][2]
-                destinations = Destinations(arr, axis.units, hardware, method, passed_args)
+                destinations = Destinations(arr, axis.units, hardware, method, passed_args, i)
                 destinations_list.append(destinations)
-        constant_dict = {c.name: c for c in constants}
-        for constant in constant_resolver.const_order(
-            **{c.name: c.expression for c in constants}
-        ):  # must follow axes
-            constant = constant_dict[constant]
-            if constant.static:
-                pass
-            else:
-                # initialize
-                expression = constant.expression
-                arr = np.full(arrs[0].shape, np.nan)
-                units = constant.units
-                vals = {}
-                # populate all hardwares not scanned here
-                for hardware in all_hardwares:
-                    if wt.units.is_valid_conversion(hardware.units, units):
-                        vals[hardware.name] = hardware.get_position(units)
-                for idx in np.ndindex(arrs[0].shape):
-                    for destination in destinations_list:
-                        if wt.units.is_valid_conversion(destination.units, units):
-                            val = wt.units.converter(
-                                destination.arr[idx], destination.units, units
-                            )
-                            vals[destination.hardware.name] = val
-                    arr[idx] = numexpr.evaluate(expression, vals)
-                # finish
-                hardware = constant.hardware
-                destinations = Destinations(arr, units, hardware, "set_position", None)
-                destinations_list.insert(0, destinations)
         # check if scan is valid for hardware ---------------------------------
-        # TODO: !!!
+        action = self.read_option("out of limits", "abort")
+        out_of_limits = check_limits(destinations_list)
+        if action == "clip":
+            clip_to_limits(out_of_limits)  # before constants, which follow the clipped axes
+        constant_destinations = []
+        for constant, arr in constant_resolver.evaluate(
+            constants, destinations_list, all_hardwares, shape
+        ):  # must follow axes
+            hardware = constant.hardware
+            destinations = Destinations(arr, constant.units, hardware, "set_position", None)
+            constant_destinations.insert(0, destinations)
+        destinations_list[:0] = constant_destinations
+        if constant_destinations:
+            constants_out_of_limits = check_limits(constant_destinations)
+            if action == "clip":
+                clip_to_limits(constants_out_of_limits)
+            out_of_limits += constants_out_of_limits
+        invalid = None
+        if out_of_limits:
+            lines = []
+            for d, flat in out_of_limits:
+                where = list(zip(*[a.tolist() for a in np.unravel_index(flat[:5], shape)]))
+                lines.append(f"{d.hardware.name}: {flat.size} points, e.g. at {where}")
+            message = "\n".join(lines)
+            g.logger.log("warning", f"Destinations out of limits ({action})", message)
+            if action == "truncate":
+                invalid = set(np.concatenate([flat for _, flat in out_of_limits]).tolist())
+            elif action != "clip":
+                raise ValueError(f"scan destinations out of hardware limits\n{message}")
         # run through aquisition order handler --------------------------------
-        idxs, slices = order.process(destinations_list)
+        adaptive = None
+        if self.read_option("adaptive", False):
+            adaptive = order.adaptive.Adaptive(
+                shape,
+                budget=self.read_option("adaptive budget", 0.25),
+                tolerance=self.read_option("adaptive tolerance", 0.0),
+                criterion=self.read_option("adaptive criterion", "gradient"),
+                coarse_level=self.read_option("adaptive coarse level", 1),
+            )
+            adaptive_channel = self.read_option(
+                "adaptive channel", list(yaqc_cmds.sensors.get_channels_dict())[0]
+            )
+            idxs, slices = adaptive, []
+        else:
+            idxs, slices = order.process(destinations_list, self.read_option("order", "ndindex"))
+        fast_axis = order.fast_axis(idxs, len(shape))
+        npts = float(len(idxs))
         # initialize scan -----------------------------------------------------
         g.queue_control.write(True)
         self.going.write(True)
@@ -237,64 +359,153 @@ class Worker(QtCore.QObject):
             headers["acquisition url"] = self.aqn.read("info", "url")
             headers["scan url"] = scan_url
         path = scan_folder + os.sep + "data.wt5"
-        create_data(
+        shots = int(self.read_option("shots", 1))
+        self.buffer = PointBuffer(
+            self.read_option("flush", "point"),
+            count=self.read_option("flush count", 100),
+            period=self.read_option("flush period", 1.0),
+        )
+        plan = create_data(
             path,
             headers,
-            destinations,
+            destinations_list,
             axes,
             constants,
             hardware=all_hardwares,
             sensors=yaqc_cmds.sensors.sensors,
+            shots=shots,
+            live_window=int(self.read_option("live window", 0)) or None,
+            tables={"timing": [f"idx{i}" for i in range(len(shape))] + ["start"] + phases},
+            fast_axis=fast_axis,
         )
         # acquire -------------------------------------------------------------
         self.fraction_complete.write(0.0)
         slice_index = 0
-        npts = float(len(idxs))
-        for i, idx in enumerate(idxs):
-            idx = tuple(idx)
-            # launch hardware
-            for d in destinations_list:
-                destination = d.arr[idx]
-                if d.method == "set_position":
-                    d.hardware.set_position(destination, d.units)
-                else:
-                    inputs = copy.copy(d.passed_args)
-                    for input_index, input_val in enumerate(inputs):
-                        if input_val == "destination":
-                            inputs[input_index] = destination
-                        elif input_val == "units":
-                            inputs[input_index] = d.units
-                    d.hardware.q.push(d.method, *inputs)
-            # execute pre_wait_methods
-            for method in pre_wait_methods:
-                method()
-            # slice
-            if slice_index < len(slices):  # takes care of last slice
-                if slices[slice_index]["index"] == i:
+        next_slice = slices[0] if len(slices) else None
+        # timing rows are appended to the data file in blocks, see finish_point
+        self.timing = np.empty((1024, len(shape) + 1 + len(phases)))
+        self.timing_count = 0
+        timer = wt.kit.Timer(verbose=False)
+        scan_start = time.time()
+        touched = [d.hardware for d in destinations_list]
+        settled = False  # until the first point acquired waited on all hardware
+        # in pipelined mode, each point is saved and announced once the next one is dispatched,
+        # so that this overlaps with the move
+        pipelined = self.read_option("pipelined", False)
+        pending = None  # (point, i, npts) not yet finished
+        # points are written from a background thread, unless 'writer queue' is 0
+        self.writer = None
+        queue_size = int(self.read_option("writer queue", 256))
+        if queue_size > 0:
+
+            def announce(i):
+                if i != npts - 1:
+                    data_file_written.emit()
+
+            self.writer = Writer(self.buffer, queue_size, written=announce)
+        try:
+            for i, idx in enumerate(idxs):
+                idx = tuple(idx)
+                # slice
+                if next_slice is not None and next_slice["index"] == i:
                     slice_index += 1
-            # wait for hardware
-            g.hardware_waits.wait()
-            # launch sensors
-            for s in yaqc_cmds.sensors.sensors:
-                s.measure()
-            # wait for sensors
-            for s in yaqc_cmds.sensors.sensors:
-                s.wait_until_still()
-            # save
-            write_data(idx=idx, hardware=all_hardwares, sensors=yaqc_cmds.sensors.sensors)
-            if i != npts - 1:
-                data_file_written.emit()
-            # update
-            self.fraction_complete.write(i / npts)
-            self.update_ui.emit()
-            # check continue
-            while self.pause.read():
-                self.paused.write(True)
-                self.pause.wait_for_update()
-            self.paused.write(False)
-            if self.stop.read():
-                self.stopped.write(True)
-                break
+                    next_slice = slices[slice_index] if slice_index < len(slices) else None
+                if invalid is not None and np.ravel_multi_index(idx, shape) in invalid:
+                    # out of limits, left nan in the data file
+                    if adaptive is not None:
+                        adaptive.tell(idx, np.nan)  # never refined around
+                    continue
+                timing = {"start": time.time(), "sensor measure": 0.0, "sensor wait": 0.0}
+                # launch hardware
+                with timer:
+                    for d in destinations_list:
+                        destination = d.arr[idx]
+                        if d.method == "set_position":
+                            d.hardware.set_position(destination, d.units)
+                        else:
+                            inputs = copy.copy(d.passed_args)
+                            for input_index, input_val in enumerate(inputs):
+                                if input_val == "destination":
+                                    inputs[input_index] = destination
+                                elif input_val == "units":
+                                    inputs[input_index] = d.units
+                            d.hardware.q.push(d.method, *inputs)
+                    # execute pre_wait_methods
+                    for method in pre_wait_methods:
+                        method()
+                timing["dispatch"] = timer.interval
+                if pending is not None:
+                    args, pending = pending, None
+                    self.finish_point(*args)
+                # wait for hardware
+                with timer:
+                    if settled:
+                        g.hardware_waits.wait(touched)
+                    else:
+                        # also covers anything moved while the module set up the scan
+                        g.hardware_waits.wait()
+                        settled = True
+                timing["hardware wait"] = timer.interval
+                statistics = Statistics()
+                for _ in range(shots):
+                    with timer:
+                        # launch sensors
+                        for s in yaqc_cmds.sensors.sensors:
+                            s.measure()
+                        # wait for sensors
+                        for s in yaqc_cmds.sensors.sensors:
+                            s.wait_until_still()
+                    timing["sensor wait"] += timer.interval
+                    # as timed by the sensor drivers themselves
+                    timing["sensor measure"] += max(
+                        [s.measure_time.read() for s in yaqc_cmds.sensors.sensors], default=0.0
+                    )
+                    if shots > 1:
+                        statistics.add_shot(yaqc_cmds.sensors.sensors)
+                # save and update
+                point = plan.snapshot(idx)
+                point["timing"] = timing
+                point["slice end"] = order.slice_end(i, npts, slices, next_slice)
+                if shots > 1:
+                    point["channels"].update(statistics.mean)
+                    for ch, val in statistics.stderr().items():
+                        point["channels"][f"{ch}_stderr"] = val
+                if adaptive is not None:
+                    adaptive.tell(idx, point["channels"][adaptive_channel])
+                if pipelined:
+                    pending = (point, i, npts)
+                else:
+                    self.finish_point(point, i, npts)
+                # check continue
+                if pending is not None and self.pause.read():
+                    args, pending = pending, None
+                    self.finish_point(*args)  # saved and shown while paused
+                while self.pause.read():
+                    self.paused.write(True)
+                    self.pause.wait_for_update()
+                self.paused.write(False)
+                if self.stop.read():
+                    self.stopped.write(True)
+                    break
+            elapsed = time.time() - scan_start
+        finally:
+            # also on errors, so the file is left consistent and closed
+            try:
+                if pending is not None:
+                    self.finish_point(*pending)  # the last point, or the one before an error
+            finally:
+                try:
+                    if self.writer is None:
+                        self.buffer.flush()
+                    else:
+                        self.writer.close()  # drains the queue
+                finally:
+                    self.writer = None
+                    try:
+                        self.flush_timing()  # kept even if the scan failed
+                    finally:
+                        data_container.close()
+        self.save_timing(scan_folder, elapsed)
         # finish scan ---------------------------------------------------------
         self.fraction_complete.write(1.0)
         self.going.write(False)
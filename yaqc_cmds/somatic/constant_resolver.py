@@ -1,5 +1,9 @@
 import sympy
 
+import WrightTools as wt
+
+from . import lazy
+
 
 def const_order(**expressions):
     expressions = {sympy.Symbol(k): sympy.sympify(v) for k, v in expressions.items()}
@@ -13,3 +17,46 @@ def const_order(**expressions):
                 break
         if cycle:
             raise ValueError("Cycle detected in set of expressions")
+
+
+def evaluate(constants, destinations, hardware, shape):
+    """Build lazily evaluated destination arrays for non-static constants.
+
+    Constants are resolved in dependency order (see const_order), and each expression is
+    compiled once. Evaluation happens on indexing, vectorized over whatever is requested.
+
+    Parameters
+    ----------
+    constants : list of yaqc_cmds.somatic.acquisition.Constant objects
+        Constants to evaluate. Static constants are skipped.
+    destinations : list of yaqc_cmds.somatic.acquisition.Destinations objects
+        Destinations of the scanned axes. Not modified.
+    hardware : list of yaqc_cmds.hardware.Hardware objects
+        All active hardware, current positions are used for anything not scanned.
+    shape : tuple of int
+        Full scan shape.
+
+    Yields
+    ------
+    tuple
+        (constant, yaqc_cmds.somatic.lazy.ConstantArray) in evaluation order.
+    """
+    constant_dict = {c.name: c for c in constants}
+    # (name, arr, units), later entries take precedence as in a per-point walk
+    known = [(d.hardware.name, d.arr, d.units) for d in destinations]
+    for name in const_order(**{c.name: c.expression for c in constants}):
+        constant = constant_dict[name]
+        if constant.static:
+            continue
+        units = constant.units
+        sources = {}
+        for hw in hardware:
+            if wt.units.is_valid_conversion(hw.units, units):
+                sources[hw.name] = (hw.get_position(units), None)
+        for hw_name, arr, arr_units in known:
+            if wt.units.is_valid_conversion(arr_units, units):
+                sources[hw_name] = (arr, arr_units)
+        arr = lazy.ConstantArray(constant.expression, units, sources, shape)
+        # constant destinations are prepended, so scanned axes keep precedence
+        known.insert(0, (constant.hardware.name, arr, units))
+        yield constant, arr
@@ -0,0 +1,178 @@
+"""Lazily evaluated destination arrays.
+
+These stand in for full scan shape numpy arrays. Indexing them (with integers, slices or
+index arrays, exactly as a numpy array of the full scan shape) computes only the requested
+points, so memory scales with the axis lengths rather than with the number of points.
+"""
+
+
+import collections
+
+import numexpr
+import numpy as np
+
+import WrightTools as wt
+
+
+BLOCK = 4096  # points per cached block of ConstantArray
+
+
+class LazyArray:
+    def __init__(self, shape):
+        self.shape = tuple(shape)
+
+    def __array__(self, dtype=None, copy=None):
+        out = self[...]
+        return out if dtype is None else out.astype(dtype)
+
+    def __getitem__(self, key):
+        raise NotImplementedError
+
+    def _key_shape(self, key):
+        # zero stride view, indexing it only allocates the result
+        return np.broadcast_to(np.zeros(()), self.shape)[key].shape
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+
+class AxisArray(LazyArray):
+    def __init__(self, points, axis, shape, centers=None):
+        """Destinations of a scan axis, optionally about centers.
+
+        Parameters
+        ----------
+        points : 1D array
+            Axis points.
+        axis : int
+            Index of the axis within the scan.
+        shape : tuple of int
+            Full scan shape.
+        centers : array (optional)
+            Centers, broadcastable to the scan shape without this axis. Default is None.
+        """
+        super().__init__(shape)
+        sh = [1] * len(self.shape)
+        sh[axis] = self.shape[axis]
+        self._points = np.broadcast_to(np.asarray(points).reshape(sh), self.shape)
+        self._centers = None
+        if centers is not None:
+            others = self.shape[:axis] + self.shape[axis + 1 :]
+            centers = np.expand_dims(np.broadcast_to(centers, others), axis)
+            self._centers = np.broadcast_to(centers, self.shape)
+
+    def __getitem__(self, key):
+        if self._centers is None:
+            out = self._points[key]
+        else:
+            out = self._points[key] + self._centers[key]
+        return out.copy() if isinstance(out, np.ndarray) else out
+
+
+class ConstantArray(LazyArray):
+    def __init__(self, expression, units, sources, shape):
+        """Destinations of a computed constant.
+
+        Parameters
+        ----------
+        expression : string
+            numexpr expression, compiled once.
+        units : string
+            Units of the constant, all sources are converted into these.
+        sources : dictionary
+            {name: (value, units)}, value being a scalar or any (lazy) full scan shape array.
+        shape : tuple of int
+            Full scan shape.
+        """
+        super().__init__(shape)
+        self.expression = expression
+        self.units = units
+        names, _ = numexpr.necompiler.getExprNames(expression, {})
+        self._names = names
+        self._sources = [sources[name] for name in names]
+        self._program = numexpr.NumExpr(expression, signature=[(n, np.double) for n in names])
+        # single points are looked up from blocks of about BLOCK points, evaluated at once and
+        # cached, see _point
+        self._blocks = collections.OrderedDict()
+        self._last = None  # last point looked up
+        self._axis = len(self.shape) - 1  # axis along which points were last looked up
+
+    def __getitem__(self, key):
+        if (
+            isinstance(key, tuple)
+            and len(key) == len(self.shape)
+            and all(isinstance(i, (int, np.integer)) for i in key)
+        ):
+            return self._point(key)
+        return self._evaluate(key)
+
+    def _point(self, idx):
+        # blocks span the axis consecutive lookups move along, whatever the acquisition order,
+        # and as many neighboring lines along the last other axis as fit
+        if self._last is not None:
+            moved = [axis for axis, (i, j) in enumerate(zip(idx, self._last)) if i != j]
+            if len(moved) == 1:
+                self._axis = moved[0]
+        self._last = idx
+        fast = self._axis
+        key = list(idx)
+        key[fast] = slice(None)
+        position = [idx[fast]]
+        others = [axis for axis in range(len(self.shape)) if axis != fast]
+        if others:
+            other = others[-1]
+            n = max(1, BLOCK // self.shape[fast])
+            start = idx[other] // n * n
+            key[other] = slice(start, start + n)
+            position.insert(0 if other < fast else 1, idx[other] - start)
+        cache = tuple((k.start, k.stop) if isinstance(k, slice) else k for k in key)
+        if cache in self._blocks:
+            self._blocks.move_to_end(cache)
+        else:
+            self._blocks[cache] = self._evaluate(tuple(key))
+            if len(self._blocks) > 64:
+                self._blocks.popitem(last=False)
+        return np.float64(self._blocks[cache][tuple(position)])
+
+    def _evaluate(self, key):
+        vals = []
+        for value, units in self._sources:
+            if isinstance(value, (np.ndarray, LazyArray)):
+                value = value[key]
+            if units is not None:
+                value = wt.units.converter(value, units, self.units)
+            vals.append(np.asarray(value, dtype=np.double))
+        out = self._program(*vals)
+        shape = self._key_shape(key)
+        if shape == ():
+            return np.float64(out)
+        out = np.broadcast_to(out, shape)
+        return np.array(out, dtype=np.double)
+
+
+class ClippedArray(LazyArray):
+    def __init__(self, arr, units, limits, limits_units):
+        """Destinations replaced by the nearest limit wherever they fall outside of limits."""
+        super().__init__(arr.shape)
+        self._arr = arr
+        self.units = units
+        self.min_value, self.max_value = limits
+        self.limits_units = limits_units
+
+    def __getitem__(self, key):
+        out = np.array(self._arr[key], dtype=np.double)
+        native = out
+        if self.units is not None:
+            native = np.asarray(wt.units.converter(out, self.units, self.limits_units))
+        invalid = (native < self.min_value) | (native > self.max_value)
+        if invalid.any():
+            clipped = np.clip(native[invalid], self.min_value, self.max_value)
+            if self.units is not None:
+                clipped = wt.units.converter(clipped, self.limits_units, self.units)
+            out[invalid] = clipped
+        return np.float64(out) if out.shape == () else out
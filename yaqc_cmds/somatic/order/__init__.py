@@ -0,0 +1,36 @@
+"""Acquisition order strategies.
+
+Each strategy is a function accepting the scan's list of Destinations and returning
+(idxs, slices), the ordered indices of every point and the slices list of dictionaries.
+The strategy for an acquisition is chosen with the order option of its aqn file.
+Adaptive acquisition, which depends on measured values, is handled separately by the worker.
+"""
+
+
+from ._common import Indices, Slices, fast_axis, slice_end
+from . import adaptive
+from . import ndindex
+from . import progressive
+from . import snake
+from . import travel
+
+
+strategies = {}
+
+
+def register(name, process):
+    strategies[name] = process
+
+
+register("ndindex", ndindex.process)
+register("progressive", progressive.process)
+register("snake", snake.process)
+register("travel", travel.process)
+
+
+def process(destinations_list, strategy="ndindex"):
+    if strategy not in strategies:
+        raise ValueError(
+            f"unknown acquisition order '{strategy}', expected one of {list(strategies)}"
+        )
+    return strategies[strategy](destinations_list)
@@ -0,0 +1,137 @@
+"""Building blocks shared by acquisition order strategies.
+
+Indices are generated in chunks, so no strategy needs to hold every index of a scan at once.
+"""
+
+
+import numpy as np
+
+
+CHUNK = 65536
+
+
+def index_arrays(shape, nesting=None, snake=False, start=0, stop=None):
+    """Indices of scan points, in acquisition order.
+
+    Parameters
+    ----------
+    shape : tuple of int
+        Full scan shape.
+    nesting : list of int (optional)
+        Axes from slowest to fastest. Default is C order.
+    snake : bool (optional)
+        Reverse the direction of each axis whenever a slower axis steps, such that consecutive
+        points are always neighbors. Default is False.
+    start, stop : int (optional)
+        Range of positions within the acquisition order. Default is all points.
+
+    Returns
+    -------
+    tuple of 1D arrays
+        One array per axis, suitable for fancy indexing destination arrays.
+    """
+    ndim = len(shape)
+    if nesting is None:
+        nesting = list(range(ndim))
+    if stop is None:
+        stop = int(np.prod(shape))
+    nested_shape = tuple(shape[a] for a in nesting)
+    counters = np.unravel_index(np.arange(start, stop), nested_shape)
+    out = [None] * ndim
+    prefix = np.zeros(stop - start, dtype=int)  # raster count of slower axes
+    for position, axis in enumerate(nesting):
+        counter = counters[position]
+        if snake:
+            out[axis] = np.where(prefix % 2, nested_shape[position] - 1 - counter, counter)
+        else:
+            out[axis] = counter
+        prefix = prefix * nested_shape[position] + counter
+    return tuple(out)
+
+
+def fast_destination(destinations_list, axis):
+    """The destination which drives axis, the last one wins."""
+    out = destinations_list[-1]
+    for d in destinations_list:
+        if getattr(d, "axis", None) == axis:
+            out = d
+    return out
+
+
+def fast_axis(idxs, ndim):
+    """Scan axis along which consecutive indices of idxs move, the last unless nested otherwise."""
+    nesting = getattr(idxs, "nesting", None)
+    return nesting[-1] if nesting else ndim - 1
+
+
+class Indices:
+    def __init__(self, shape, nesting=None, snake=False):
+        """Sized iterable of index tuples, in acquisition order, generated in chunks."""
+        self.shape = tuple(shape)
+        self.nesting = list(range(len(self.shape))) if nesting is None else list(nesting)
+        self.snake = snake
+
+    def __iter__(self):
+        for idx_arrays in self.chunks():
+            yield from zip(*[a.tolist() for a in idx_arrays])
+
+    def __len__(self):
+        return int(np.prod(self.shape))
+
+    def chunks(self, size=CHUNK):
+        for start in range(0, len(self), size):
+            stop = min(start + size, len(self))
+            yield index_arrays(self.shape, self.nesting, self.snake, start, stop)
+
+
+class Slices:
+    def __init__(self, destinations_list, indices):
+        """Sequence of slice dictionaries, one per line along the fastest axis.
+
+        Dictionaries are built on demand.
+        """
+        self.indices = indices
+        self.fast_axis = indices.nesting[-1]
+        self.length = indices.shape[self.fast_axis]
+        self.destination = fast_destination(destinations_list, self.fast_axis)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("slice index out of range")
+        start = i * self.length
+        idx_arrays = index_arrays(
+            self.indices.shape,
+            self.indices.nesting,
+            self.indices.snake,
+            start,
+            start + self.length,
+        )
+        d = self.destination
+        s = {}
+        s["index"] = start
+        s["name"] = d.hardware.name
+        s["units"] = d.units
+        s["points"] = d.arr[idx_arrays]
+        if d.method == "set_position":
+            s["use actual"] = True
+        else:
+            s["use actual"] = False
+        return s
+
+    def __len__(self):
+        return len(self.indices) // self.length
+
+
+def slice_end(i, npts, slices, next_slice):
+    """True if the i-th point acquired is the last of its slice.
+
+    next_slice is the slice following the one the point belongs to, None during the last. Scans
+    without slices (e.g. adaptive) end one at every point.
+    """
+    if not len(slices):
+        return True
+    if next_slice is None:
+        return i == npts - 1
+    return next_slice["index"] == i + 1
@@ -0,0 +1,124 @@
+"""Adaptive acquisition order, refining where the signal changes.
+
+Acquisition starts from a coarse subset of the grid (see progressive). Afterwards, every pair
+of measured points which are neighbors along some axis, but not adjacent, is a candidate to be
+bisected. Candidates are scored from the values measured so far and the best one is measured
+next, until the point budget is spent or no candidate scores above the tolerance.
+"""
+
+
+import heapq
+import itertools
+
+import numpy as np
+
+from . import progressive
+
+
+class Adaptive:
+    def __init__(self, shape, budget=0.25, tolerance=0.0, criterion="gradient", coarse_level=1):
+        """Iterable of scan indices, told the measured value at each.
+
+        Parameters
+        ----------
+        shape : tuple of int
+            Full scan shape.
+        budget : int or float (optional)
+            Maximum number of points, or fraction of the full grid if less than one. The coarse
+            grid is always measured. Default is 0.25.
+        tolerance : float (optional)
+            Stop once no candidate scores above tolerance. Default is 0.
+        criterion : {'gradient', 'curvature'} (optional)
+            How candidates are scored. Gradient uses the change between the two points,
+            curvature the deviation from a linear extrapolation of their neighbors.
+            Default is gradient.
+        coarse_level : int (optional)
+            Finest progressive level of the coarse starting grid. Default is 1.
+        """
+        self.shape = tuple(shape)
+        size = int(np.prod(self.shape))
+        if budget < 1:
+            budget = int(np.ceil(budget * size))
+        self.budget = min(int(budget), size)
+        self.tolerance = tolerance
+        if criterion not in ("gradient", "curvature"):
+            raise ValueError(f"unknown adaptive criterion '{criterion}'")
+        self.criterion = criterion
+        levels = progressive.Progressive(self.shape)
+        self.coarse = [
+            idx
+            for level in range(min(coarse_level + 1, levels.nlevels))
+            for idx in levels.level(level)
+        ]
+        self.budget = max(self.budget, len(self.coarse))
+        self.measured = np.zeros(self.shape, dtype=bool)
+        self.values = {}
+        self._candidates = []
+        self._counter = itertools.count()  # tie breaker, keeps heap entries comparable
+
+    def __iter__(self):
+        for idx in self.coarse:
+            yield idx
+        count = len(self.coarse)
+        while count < self.budget and self._candidates:
+            score, _, idx = heapq.heappop(self._candidates)
+            if self.measured[idx]:
+                continue
+            if -score <= self.tolerance:
+                break
+            yield idx
+            count += 1
+
+    def __len__(self):
+        return self.budget
+
+    def _line(self, idx, axis):
+        line = list(idx)
+        line[axis] = slice(None)
+        return np.flatnonzero(self.measured[tuple(line)])
+
+    def _at(self, idx, axis, i):
+        out = list(idx)
+        out[axis] = int(i)
+        return tuple(out)
+
+    def _score(self, idx, axis, a, b, line):
+        va = self.values[self._at(idx, axis, a)]
+        vb = self.values[self._at(idx, axis, b)]
+        slope = (vb - va) / (b - a)
+        if self.criterion == "gradient":
+            score = np.abs(vb - va)
+        else:
+            score = np.zeros_like(slope)
+            below = line[line < a]
+            above = line[line > b]
+            if below.size:
+                c = below[-1]
+                vc = self.values[self._at(idx, axis, c)]
+                score = np.maximum(score, np.abs(slope - (va - vc) / (a - c)) * (b - a))
+            if above.size:
+                d = above[0]
+                vd = self.values[self._at(idx, axis, d)]
+                score = np.maximum(score, np.abs((vd - vb) / (d - b) - slope) * (b - a))
+            if not below.size and not above.size:
+                score = np.abs(vb - va)
+        # points told nan, e.g. skipped out of limits, bound intervals which are never refined
+        score = np.asarray(score)[np.isfinite(score)]
+        return float(np.max(score)) if score.size else 0.0
+
+    def tell(self, idx, value):
+        """Record the value measured at idx, and queue the intervals it bounds."""
+        idx = tuple(idx)
+        self.measured[idx] = True
+        self.values[idx] = np.asarray(value, dtype=float)
+        for axis in range(len(self.shape)):
+            line = self._line(idx, axis)
+            position = int(np.searchsorted(line, idx[axis]))
+            # intervals on both sides, and those next to them whose curvature changed
+            for lo in range(max(position - 2, 0), min(position + 2, line.size - 1)):
+                a, b = line[lo], line[lo + 1]
+                if b - a < 2:
+                    continue
+                score = self._score(idx, axis, a, b, line)
+                middle = self._at(idx, axis, (a + b) // 2)
+                heapq.heappush(self._candidates, (-score, next(self._counter), middle))
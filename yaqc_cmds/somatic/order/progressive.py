@@ -0,0 +1,114 @@
+"""Coarse-to-fine acquisition order.
+
+Each axis is sampled with strides 2**k, 2**(k-1), ..., 1, always including its last point. A
+point belongs to the finest level of any of its axes, and levels are acquired in turn, such
+that once a level is finished the whole scan is covered on a regular (coarser) grid.
+"""
+
+
+import itertools
+
+import numpy as np
+
+from ._common import Indices, fast_destination
+
+
+def axis_levels(n):
+    """Level of every index of an axis with n points, 0 being the coarsest."""
+    levels = np.zeros(n, dtype=int)
+    if n < 3:
+        return levels
+    coarsest = 1 << int(np.log2(n - 1))
+    stride = coarsest
+    level = 0
+    assigned = np.zeros(n, dtype=bool)
+    while stride >= 1:
+        here = (np.arange(n) % stride == 0) & ~assigned
+        if level == 0:
+            here[-1] = True
+        levels[here] = level
+        assigned |= here
+        stride //= 2
+        level += 1
+    return levels
+
+
+class Progressive:
+    def __init__(self, shape):
+        """Sized iterable of index tuples, level by level, generated in chunks."""
+        self.shape = tuple(shape)
+        self.axis_levels = [axis_levels(n) for n in self.shape]
+        self.nlevels = max(int(lv.max()) for lv in self.axis_levels) + 1
+
+    def __iter__(self):
+        for level in range(self.nlevels):
+            yield from self.level(level)
+
+    def __len__(self):
+        return int(np.prod(self.shape))
+
+    def counts(self):
+        """Number of points in each level."""
+        cumulative = [
+            int(np.prod([np.sum(lv <= level) for lv in self.axis_levels]))
+            for level in range(self.nlevels)
+        ]
+        return np.diff([0] + cumulative)
+
+    def level(self, level):
+        """Index tuples of a single level, in raster order."""
+        # the level lies on its own grid, only points of coarser grids are left out
+        grid = [np.flatnonzero(lv <= level) for lv in self.axis_levels]
+        for idx_arrays in Indices(tuple(g.size for g in grid)).chunks():
+            idx_arrays = [g[a] for g, a in zip(grid, idx_arrays)]
+            levels = np.max([lv[a] for lv, a in zip(self.axis_levels, idx_arrays)], axis=0)
+            here = levels == level
+            yield from zip(*[a[here].tolist() for a in idx_arrays])
+
+
+class Slices:
+    def __init__(self, destinations_list, progressive, length=None):
+        """Sequence of slice dictionaries, built on demand.
+
+        Each level is split into slices of at most length points, in acquisition order. Default
+        length is that of the last axis, as for raster orders.
+        """
+        self.progressive = progressive
+        self.length = int(length or progressive.shape[-1])
+        counts = progressive.counts()
+        self.level_starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        self.pieces = -(-counts // self.length)  # slices per level
+        self.first = np.concatenate([[0], np.cumsum(self.pieces)[:-1]])  # first slice of level
+        self.destination = fast_destination(destinations_list, len(progressive.shape) - 1)
+        self._cursor = None  # (next slice, iterator over the rest of its level)
+
+    def __getitem__(self, i):
+        i = range(len(self))[i]
+        level = int(np.searchsorted(self.first, i, side="right")) - 1
+        piece = i - int(self.first[level])
+        if self._cursor is not None and self._cursor[0] == i:
+            remaining = self._cursor[1]
+        else:
+            # slices are usually read in turn, otherwise the level is walked from its start
+            remaining = itertools.islice(self.progressive.level(level), piece * self.length, None)
+        idxs = list(itertools.islice(remaining, self.length))
+        self._cursor = (i + 1, remaining) if piece + 1 < self.pieces[level] else None
+        d = self.destination
+        s = {}
+        s["index"] = int(self.level_starts[level]) + piece * self.length
+        s["name"] = d.hardware.name
+        s["units"] = d.units
+        s["points"] = d.arr[tuple(np.array(idxs).T)]
+        if d.method == "set_position":
+            s["use actual"] = True
+        else:
+            s["use actual"] = False
+        return s
+
+    def __len__(self):
+        return int(np.sum(self.pieces))
+
+
+def process(destinations_list):
+    out = Progressive(destinations_list[-1].arr.shape)
+    return out, Slices(destinations_list, out)
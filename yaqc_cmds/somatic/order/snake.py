@@ -0,0 +1,9 @@
+"""Boustrophedon (snake) acquisition order."""
+
+
+from ._common import Indices, Slices
+
+
+def process(destinations_list, nesting=None):
+    out = Indices(destinations_list[-1].arr.shape, nesting, snake=True)
+    return out, Slices(destinations_list, out)
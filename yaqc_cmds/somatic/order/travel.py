@@ -0,0 +1,136 @@
+"""Acquisition order minimizing estimated total travel time.
+
+Every nesting of the scan axes is considered, both raster and snake, and the one with the
+lowest estimated time is chosen. Moves within a point happen concurrently, so each step costs
+as much as its slowest hardware. Hardware speed (native units per second) and backlash (native
+units, paid twice on every reversal of direction) are read from the hardware config. Without a
+configured speed, a full-range move of that hardware is taken to cost one second.
+
+The cost of stepping each axis is measured once, on a few lines sampled along it, and every
+nesting is then estimated from how many times each axis steps. Only the chosen order is ever
+generated.
+"""
+
+
+import itertools
+
+import numpy as np
+
+import WrightTools as wt
+
+from . import ndindex
+from ._common import Indices, Slices
+
+
+SAMPLES = 3  # lines sampled along each axis per other axis, at its ends and middle
+
+
+def _native(d, values):
+    units = getattr(d.hardware, "native_units", None)
+    if d.units is None or units is None or not wt.units.is_valid_conversion(d.units, units):
+        return values
+    return wt.units.converter(values, d.units, units)
+
+
+def _lines(shape, axis):
+    """Index arrays of a few lines along axis, one row per line."""
+    others = [
+        np.unique(np.linspace(0, n - 1, min(n, SAMPLES)).round().astype(int))
+        for i, n in enumerate(shape)
+        if i != axis
+    ]
+    starts = np.array(list(itertools.product(*others)), dtype=int).reshape(-1, len(shape) - 1)
+    out = []
+    for i, n in enumerate(shape):
+        if i == axis:
+            out.append(np.broadcast_to(np.arange(n), (len(starts), n)))
+        else:
+            column = starts[:, i if i < axis else i - 1]
+            out.append(np.broadcast_to(column[:, None], (len(starts), shape[axis])))
+    return tuple(out)
+
+
+def profile(destinations_list, shape):
+    """Cost, in seconds, of moving along each axis, per hardware.
+
+    Returns
+    -------
+    list of dictionaries
+        One per axis, {hardware name: (step, flyback, reversal)}. Step is the mean cost of one
+        step along the axis, flyback that of returning to its start after a line (raster) and
+        reversal the backlash paid on the next move after changing direction.
+    """
+    positions = []
+    for axis in range(len(shape)):
+        lines = _lines(shape, axis)
+        positions.append(
+            [np.asarray(_native(d, d.arr[lines]), dtype=float) for d in destinations_list]
+        )
+    out = [{} for _ in shape]
+    for i, d in enumerate(destinations_list):
+        speed = getattr(d.hardware, "speed", None)
+        if not speed:
+            low = min(np.min(p[i]) for p in positions)
+            high = max(np.max(p[i]) for p in positions)
+            speed = max(high - low, np.finfo(float).tiny)
+        backlash = getattr(d.hardware, "backlash", None) or 0.0
+        for axis, p in enumerate(positions):
+            steps = np.diff(p[i], axis=1)
+            if not steps.size or not steps.any():
+                continue
+            # reversals within lines, between consecutive moves
+            direction = np.sign(steps)
+            reversals = 0
+            for row in direction:
+                row = row[row != 0]
+                reversals += np.count_nonzero(row[1:] != row[:-1])
+            step = (np.mean(np.abs(steps)) + 2 * backlash * reversals / steps.size) / speed
+            flyback = (np.mean(np.abs(p[i][:, -1] - p[i][:, 0])) + 2 * backlash) / speed
+            reversal = 2 * backlash / speed
+            costs = (step, flyback, reversal)
+            key = d.hardware.name
+            if key in out[axis]:
+                costs = tuple(max(a, b) for a, b in zip(out[axis][key], costs))
+            out[axis][key] = costs
+    return out
+
+
+def estimate(profile, shape, nesting, snake=False):
+    """Estimated time, in seconds, to visit every point of shape in the given order.
+
+    Whenever an axis steps, every faster axis flies back to its start concurrently (raster) or
+    stays (snake). Either way, each faster axis then reverses direction on its next move.
+    """
+    total = 0.0
+    outer = 1
+    for position, axis in enumerate(nesting):
+        per_hardware = {}
+        reversals = 0.0
+        for key, (step, _, _) in profile[axis].items():
+            per_hardware[key] = step
+        for inner in nesting[position + 1 :]:
+            for key, (_, flyback, reversal) in profile[inner].items():
+                if not snake:
+                    per_hardware[key] = per_hardware.get(key, 0.0) + flyback
+                reversals += reversal
+        cost = max(per_hardware.values(), default=0.0) + reversals
+        total += (shape[axis] - 1) * outer * cost
+        outer *= shape[axis]
+    return float(total)
+
+
+def process(destinations_list):
+    shape = destinations_list[-1].arr.shape
+    ndim = len(shape)
+    if ndim == 1:
+        return ndindex.process(destinations_list)
+    costs = profile(destinations_list, shape)
+    best = None
+    for nesting in itertools.permutations(range(ndim)):
+        for snake in (False, True):
+            cost = estimate(costs, shape, nesting, snake)
+            if best is None or cost < best[0]:
+                best = (cost, nesting, snake)
+    _, nesting, snake = best
+    indices = Indices(shape, nesting, snake=snake)
+    return indices, Slices(destinations_list, indices)
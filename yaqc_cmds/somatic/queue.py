@@ -95,7 +95,7 @@ class Hardware(Item):
     def execute(self):
         for hw in self.hardwares:
             hw.set_position(self.value, self.units)
-        g.hardware_waits.wait()
+        g.hardware_waits.wait(self.hardwares)
 
     def write_to_ini(self, ini, section):
         ini.write(section, "value", self.value)